@@ -0,0 +1,246 @@
+"""
+Admission control in front of the Gemini quota
+
+Every Gemini call must first be admitted by a pair of token buckets sized
+to the configured requests-per-minute and tokens-per-minute quota. When
+the buckets are empty, callers wait in a bounded queue that is served
+round-robin per client, so one busy client cannot starve the others. A
+request that cannot be admitted before its deadline is rejected at once
+with a Retry-After estimate instead of tying up a worker until Gemini
+answers with a quota error.
+"""
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+log = logging.getLogger("career_compass.admission")
+
+# Client identity of the request being handled, set by the HTTP middleware
+current_client = contextvars.ContextVar("current_client", default="anonymous")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted within its deadline"""
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Gemini capacity exhausted ({reason}), retry in {self.retry_after}s")
+
+
+class TokenBucket:
+    """Classic token bucket; a rate of 0 disables it"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available"""
+        if not self.rate:
+            return 0.0
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate)
+
+    def take(self, amount: float):
+        if self.rate:
+            self.tokens -= min(amount, self.capacity)
+
+
+class _Waiter:
+    __slots__ = ("client", "cost", "future")
+
+    def __init__(self, client: str, cost: int, future: asyncio.Future):
+        self.client = client
+        self.cost = cost
+        self.future = future
+
+
+class AdmissionController:
+    """RPM/TPM token buckets with a bounded, per-client fair wait queue"""
+
+    def __init__(self, rpm: float, tpm: float, max_queue: int = 100, max_queue_per_client: int = 10,
+                 max_wait: float = 30.0, burst: float = 10.0, output_tokens: int = 1024,
+                 quota_backoff: float = 10.0):
+        # Buckets refill continuously and hold at most `burst` seconds of quota
+        self.requests = TokenBucket(rpm / 60, max(1.0, rpm / 60 * burst))
+        self.tokens = TokenBucket(tpm / 60, max(1.0, tpm / 60 * burst))
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.max_wait = max_wait
+        self.output_tokens = output_tokens
+        self.quota_backoff = quota_backoff
+        self.paused_until = 0.0
+        self._queues = OrderedDict()  # client -> deque of waiters, in round-robin order
+        self._timer = None
+        self.queued = 0
+        self.queued_tokens = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.wait_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        # GEMINI_RPM/TPM are the project's quota; each of WEB_CONCURRENCY workers gets an equal share
+        workers = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+        return cls(
+            rpm=float(os.getenv("GEMINI_RPM", "2000")) / workers,
+            tpm=float(os.getenv("GEMINI_TPM", "4000000")) / workers,
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "100")),
+            max_queue_per_client=int(os.getenv("ADMISSION_MAX_QUEUE_PER_CLIENT", "10")),
+            max_wait=float(os.getenv("ADMISSION_MAX_WAIT", "30")),
+            burst=float(os.getenv("ADMISSION_BURST", "10")),
+            output_tokens=int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS") or os.getenv("ADMISSION_OUTPUT_TOKENS", "1024")),
+            quota_backoff=float(os.getenv("ADMISSION_QUOTA_BACKOFF", "10")),
+        )
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return now
+
+    def _wait_time(self, cost: int, now: float) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(cost), self.paused_until - now)
+
+    def _backlog_wait(self, cost: int) -> float:
+        """Rough seconds until a request joining the back of the queue is admitted"""
+        now = self._refill()
+        wait = self.paused_until - now
+        if self.requests.rate:
+            wait = max(wait, (self.queued + 1 - self.requests.tokens) / self.requests.rate)
+        if self.tokens.rate:
+            wait = max(wait, (self.queued_tokens + cost - self.tokens.tokens) / self.tokens.rate)
+        return max(wait, 0.0)
+
+    def _reject(self, reason: str, cost: int):
+        self.rejected += 1
+        raise AdmissionRejected(reason, self._backlog_wait(cost))
+
+    async def acquire(self, prompt_tokens: int, client: str = None) -> float:
+        """Wait until a call with prompt_tokens may be sent; returns seconds waited
+
+        Raises AdmissionRejected when the queue is full or the request could
+        not be admitted within ADMISSION_MAX_WAIT.
+        """
+        client = client or current_client.get()
+        cost = prompt_tokens + self.output_tokens
+        now = self._refill()
+        if not self.queued and self._wait_time(cost, now) == 0:
+            self._admit(cost)
+            return 0.0
+
+        if self.queued >= self.max_queue:
+            self._reject("queue full", cost)
+        if len(self._queues.get(client, ())) >= self.max_queue_per_client:
+            self._reject("too many queued requests for this client", cost)
+        if self._backlog_wait(cost) > self.max_wait:
+            # Would miss the deadline anyway: fail now instead of after max_wait
+            self._reject("quota", cost)
+
+        waiter = _Waiter(client, cost, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        self.queued_tokens += cost
+        self._schedule(0)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter.future, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.expired += 1
+            self._reject("deadline exceeded", cost)
+        finally:
+            self._discard(waiter)
+        waited = time.monotonic() - started
+        self.wait_seconds += waited
+        return waited
+
+    def _admit(self, cost: int):
+        self.requests.take(1)
+        self.tokens.take(cost)
+        self.admitted += 1
+
+    def _discard(self, waiter: _Waiter):
+        queue = self._queues.get(waiter.client)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self.queued -= 1
+        self.queued_tokens -= waiter.cost
+        if not queue:
+            del self._queues[waiter.client]
+        if self.queued:
+            self._schedule(0)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        """Admit queued waiters round-robin across clients while quota allows"""
+        self._timer = None
+        now = self._refill()
+        while self._queues:
+            client, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            if not waiter.future.done():
+                wait = self._wait_time(waiter.cost, now)
+                if wait > 0:
+                    self._schedule(wait)
+                    return
+                self._admit(waiter.cost)
+                waiter.future.set_result(None)
+            queue.popleft()
+            self.queued -= 1
+            self.queued_tokens -= waiter.cost
+            if queue:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+
+    def backoff(self, seconds: float = None):
+        """Stop admitting for a while after Gemini itself reported quota exhaustion"""
+        seconds = self.quota_backoff if seconds is None else seconds
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        log.warning("gemini quota exhausted, pausing admissions", extra={"seconds": seconds})
+
+    def stats(self) -> dict:
+        now = self._refill()
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "requests_available": round(self.requests.tokens, 1),
+            "tokens_available": round(self.tokens.tokens),
+            "queued": self.queued,
+            "queued_clients": len(self._queues),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "total_wait_seconds": round(self.wait_seconds, 3),
+            "paused_for": round(max(self.paused_until - now, 0.0), 1),
+        }
+
+
+def client_id(request) -> str:
+    """Identify the caller for per-client fairness
+
+    Uses ADMISSION_CLIENT_HEADER (e.g. X-Forwarded-For behind a proxy) when
+    set, otherwise the peer address.
+    """
+    header = os.getenv("ADMISSION_CLIENT_HEADER")
+    if header and request.headers.get(header):
+        return request.headers[header].split(",")[0].strip()
+    return request.client.host if request.client else "anonymous"
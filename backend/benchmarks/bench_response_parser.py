@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Gemini response parser benchmark
+
+Runs every response in benchmarks/data/gemini_responses.jsonl through the
+legacy greedy-regex parser and the repairing parser, and reports how many
+produce a complete, schema-valid analysis with the expected fit score,
+plus the mean parse time. Cases with "expected_fields" must also reproduce
+those field values exactly. Append new malformed outputs to the corpus as
+they are seen in production logs.
+
+Usage:
+    python benchmarks/bench_response_parser.py [--repeat 200]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from response_parser import ANALYSIS_FIELDS, parse_analysis  # noqa: E402
+
+CORPUS_PATH = os.path.join(BACKEND_DIR, "benchmarks", "data", "gemini_responses.jsonl")
+
+
+def legacy_parse(response_text: str) -> dict:
+    """The original parse_gemini_response: greedy regex, then a fixed-score fallback"""
+    try:
+        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+    except Exception:
+        pass
+    return {"fit_score": 70, "feedback": response_text, "skills_match": {"matched": [], "missing": []},
+            "improvement_suggestions": [], "missing_skills": []}
+
+
+def is_valid(analysis: dict) -> bool:
+    """True when every AnalysisResponse field is present with the right type"""
+    if not all(field in analysis for field in ANALYSIS_FIELDS):
+        return False
+    return (isinstance(analysis["fit_score"], int)
+            and isinstance(analysis["feedback"], str)
+            and isinstance(analysis["skills_match"], dict)
+            and isinstance(analysis["improvement_suggestions"], list)
+            and isinstance(analysis["missing_skills"], list))
+
+
+def evaluate(parser, cases: list, repeat: int) -> dict:
+    valid = correct = 0
+    failures = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            parser(case["text"])
+    elapsed = time.perf_counter() - started
+    for case in cases:
+        analysis = parser(case["text"])
+        ok = is_valid(analysis)
+        valid += ok
+        # Cases may also pin field values, e.g. strings that must survive repair unchanged
+        expected_fields = case.get("expected_fields", {})
+        if (ok and analysis["fit_score"] == case["expected_fit_score"]
+                and all(analysis.get(field) == value for field, value in expected_fields.items())):
+            correct += 1
+        else:
+            failures.append(case["name"])
+    return {
+        "schema_valid": valid,
+        "correct_fit_score": correct,
+        "failures": failures,
+        "mean_parse_us": round(elapsed / (repeat * len(cases)) * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="timing iterations over the corpus")
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    print(json.dumps({
+        "cases": len(cases),
+        "legacy": evaluate(legacy_parse, cases, args.repeat),
+        "repairing": evaluate(parse_analysis, cases, args.repeat),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
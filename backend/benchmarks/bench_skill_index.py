@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Skill index throughput benchmark
+
+Builds an Aho-Corasick index over the real taxonomy padded with synthetic
+skills (10k+ aliases by default), then measures build/load time and
+matching throughput in MB/s of resume text. A per-skill regex loop is
+timed on a smaller sample for comparison.
+
+Usage:
+    python benchmarks/bench_skill_index.py [--skills 10000] [--megabytes 2]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from local_analyzer import SkillTaxonomy  # noqa: E402
+from skill_index import SkillIndex  # noqa: E402
+
+
+def synthetic_aliases(base: dict, total: int, rng: random.Random) -> dict:
+    """Pad the real alias table with generated multi-word skill names"""
+    syllables = ["ka", "ro", "ben", "tor", "lix", "qua", "zen", "mor", "vex", "pli", "dra", "nu"]
+    aliases = dict(base)
+    while len(aliases) < total:
+        words = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        alias = " ".join(words)
+        aliases.setdefault(alias, alias.title())
+    return aliases
+
+
+def corpus(megabytes: float) -> str:
+    with open(os.path.join(BACKEND_DIR, "dummy_resume.txt"), encoding="utf-8") as f:
+        resume = f.read()
+    repeats = max(1, int(megabytes * 1024 * 1024 / len(resume)))
+    return "\n".join([resume] * repeats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skills", type=int, default=10000, help="number of aliases in the index")
+    parser.add_argument("--megabytes", type=float, default=2.0, help="size of the text corpus")
+    parser.add_argument("--regex-sample-kb", type=int, default=32, help="text size for the regex baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    aliases = synthetic_aliases(SkillTaxonomy.load(prebuilt_path=None).aliases, args.skills, rng)
+    text = corpus(args.megabytes)
+    megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+
+    started = time.perf_counter()
+    index = SkillIndex(aliases)
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "skills.index")
+        index.save(path)
+        started = time.perf_counter()
+        SkillIndex.load(path)
+        load_seconds = time.perf_counter() - started
+        index_bytes = os.path.getsize(path)
+
+    started = time.perf_counter()
+    matches = index.find_all(text)
+    match_seconds = time.perf_counter() - started
+
+    sample = text[:args.regex_sample_kb * 1024]
+    patterns = [re.compile(r"(?<![\w+#])" + re.escape(alias) + r"(?![\w+#])") for alias in aliases]
+    started = time.perf_counter()
+    for pattern in patterns:
+        pattern.findall(sample.lower())
+    regex_seconds = time.perf_counter() - started
+    sample_megabytes = len(sample.encode("utf-8")) / (1024 * 1024)
+
+    print(json.dumps({
+        "aliases": len(aliases),
+        "states": index.size,
+        "build_seconds": round(build_seconds, 3),
+        "prebuilt_load_seconds": round(load_seconds, 3),
+        "prebuilt_bytes": index_bytes,
+        "corpus_megabytes": round(megabytes, 2),
+        "matches": len(matches),
+        "aho_corasick_mb_per_s": round(megabytes / match_seconds, 2),
+        "regex_loop_mb_per_s": round(sample_megabytes / regex_seconds, 4),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+
+Measures, over several fresh processes:
+- import: time to `import main`
+- live: launch to /health/live answering (port bound)
+- ready: launch to /health/ready returning 200 (warm-up finished)
+- first_request / second_request: latency of the first two /analyze/text calls
+
+The server runs under uvicorn with GEMINI_BACKEND=fake and zero LLM
+latency, so only our own startup cost is measured. The report also lists
+the slowest imports (python -X importtime) to show what to make lazy next.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--app main]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server_env(workdir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "GEMINI_BACKEND": "fake",
+        "FAKE_LLM_LATENCY": "fixed:0",
+        "ANALYSIS_CACHE_DB": "",
+        "EXTRACTION_CACHE_DB": os.path.join(workdir, "extractions.db"),
+        "JOBS_DB": os.path.join(workdir, "jobs.db"),
+        "JD_LIBRARY_DB": os.path.join(workdir, "postings.db"),
+        "PROFILES_DB": os.path.join(workdir, "profiles.db"),
+        "LOG_ACCESS": "false",
+    })
+    return env
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_import(app: str, env: dict) -> float:
+    code = f"import time; started = time.perf_counter(); import {app}; print(time.perf_counter() - started)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(app: str, env: dict, top: int) -> list:
+    """Modules imported directly by the app, slowest (cumulative) first"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {app}"], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only modules imported directly by the app module (one nesting level below it)
+        if name.startswith("   ") and not name.startswith("    "):
+            modules.append((name.strip(), int(cumulative) / 1000))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return [{"module": name, "ms": round(ms, 1)} for name, ms in modules[:top]]
+
+
+def wait_for(client: httpx.Client, path: str, process, timeout: float = 60) -> float:
+    """Poll path until it returns 200; returns the time it happened (perf_counter)"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{path} did not return 200 within {timeout}s")
+
+
+def analysis_latency(client: httpx.Client, resume: str, job_description: str) -> float:
+    started = time.perf_counter()
+    response = client.post("/analyze/text", json={"resume_text": resume, "job_description": job_description})
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def measure_server(app: str, env: dict, resume: str, job_description: str) -> dict:
+    port = free_port()
+    launched = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{app}:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            live = wait_for(client, "/health/live" if app == "main" else "/health", process)
+            first = analysis_latency(client, resume + "\nrun 1", job_description)
+            second = analysis_latency(client, resume + "\nrun 2", job_description)
+            ready = wait_for(client, "/health/ready", process) if app == "main" else live
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {"live": live - launched, "ready": ready - launched, "first_request": first, "second_request": second}
+
+
+def summarize(values: list) -> dict:
+    return {"median_ms": round(statistics.median(values) * 1000, 1),
+            "min_ms": round(min(values) * 1000, 1), "max_ms": round(max(values) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--app", default="main", help="module to measure: main or simple_server")
+    parser.add_argument("--top-imports", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    with open(os.path.join(BACKEND_DIR, "dummy_resume.txt"), encoding="utf-8") as f:
+        resume = f.read()
+    with open(os.path.join(BACKEND_DIR, "dummy_jd.txt"), encoding="utf-8") as f:
+        job_description = f.read()
+
+    with tempfile.TemporaryDirectory(prefix="career-compass-startup-") as workdir:
+        env = server_env(workdir)
+        imports = [time_import(args.app, env) for _ in range(args.runs)]
+        runs = [measure_server(args.app, env, resume, job_description) for _ in range(args.runs)]
+        report = {
+            "app": args.app,
+            "runs": args.runs,
+            "import": summarize(imports),
+            **{metric: summarize([run[metric] for run in runs]) for metric in runs[0]},
+            "slowest_imports": slowest_imports(args.app, env, args.top_imports),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Text decoding benchmark
+
+Compares the fast-path decoder in extractors.py (BOM check, strict UTF-8,
+sampled detection) with the previous approaches: trying five encodings
+in turn, and running chardet over the whole byte string. Each is timed
+on a UTF-8 and a cp1252 document of the requested size.
+
+Usage:
+    python benchmarks/bench_text_decoding.py [--megabytes 2]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import chardet
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from extractors import decode_text  # noqa: E402
+
+
+def legacy_encoding_loop(data: bytes) -> str:
+    """The original decode_file_content in main.py"""
+    for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+
+
+def legacy_full_chardet(data: bytes) -> str:
+    """The original simple_server decoding: UTF-8, then chardet over every byte"""
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        detected = chardet.detect(data)
+        return data.decode(detected["encoding"] or "latin1")
+
+
+def timed(function, data: bytes, repeat: int) -> tuple:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        text = function(data)
+    return (time.perf_counter() - started) / repeat * 1000, text
+
+
+def corpus(megabytes: float) -> str:
+    with open(os.path.join(BACKEND_DIR, "dummy_resume.txt"), encoding="utf-8") as f:
+        resume = f.read() + "\nRéférences: café, naïve, “São Paulo” – Zürich, €50k\n"
+    repeats = max(1, int(megabytes * 1024 * 1024 / len(resume)))
+    return "\n".join([resume] * repeats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=2.0, help="size of each test document")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement")
+    args = parser.parse_args()
+
+    text = corpus(args.megabytes)
+    # Load chardet's models before timing anything
+    chardet.detect("naïve".encode("cp1252"))
+    report = {}
+    for encoding in ("utf-8", "cp1252"):
+        data = text.encode(encoding)
+        results = {}
+        for name, function in (
+            ("fast_path", lambda raw: decode_text(raw)[0]),
+            ("encoding_loop", legacy_encoding_loop),
+            ("full_chardet", legacy_full_chardet),
+        ):
+            elapsed_ms, decoded = timed(function, data, args.repeat)
+            results[name] = {"ms": round(elapsed_ms, 2), "correct": decoded == text}
+        report[encoding] = {"megabytes": round(len(data) / (1024 * 1024), 2), **results}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
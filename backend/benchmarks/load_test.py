@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Load test for /analyze/text and /analyze/files
+
+Starts the API in a subprocess with GEMINI_BACKEND=fake (see fake_llm.py),
+so no API key or network is needed and Gemini latency and failures follow
+the --latency / --failure-rate settings. --record saves the responses (of
+the fake or, with --backend gemini, the real model) and --replay serves
+them again without any LLM (see llm_recorder.py). Then it drives the
+analysis endpoints at a fixed concurrency with the dummy resume and job
+description, and prints a JSON report: throughput, p50/p95/p99 latency, status codes,
+server memory (RSS) and the server's mean time per pipeline stage taken
+from /metrics. Save reports with --output and compare them across commits.
+
+Every request gets a unique resume by default so the result and extraction
+caches do not hide the pipeline; --cached sends identical documents.
+--url points the load at an already running server instead.
+
+Requires httpx (pip install httpx).
+
+Usage:
+    python benchmarks/load_test.py [--endpoint both] [--concurrency 16] [--requests 400]
+                                   [--latency lognormal:800,0.5] [--failure-rate 0.02]
+                                   [--output reports/load.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = {"text": "/analyze/text", "files": "/analyze/files"}
+STAGE_PATTERN = re.compile(r'^career_compass_stage_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+
+def percentile(ordered: list, fraction: float):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    summary = {"mean": sum(ordered) / len(ordered) if ordered else None, "p50": percentile(ordered, 0.5),
+               "p95": percentile(ordered, 0.95), "p99": percentile(ordered, 0.99), "max": ordered[-1] if ordered else None}
+    return {key: round(value * 1000, 1) if value is not None else None for key, value in summary.items()}
+
+
+def process_rss_mb(pid: int) -> float:
+    """Resident memory of a process and its children (e.g. the PDF pool), Linux only"""
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as status:
+                total_kb += next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+            with open(f"/proc/{current}/task/{current}/children") as children:
+                pending.extend(int(child) for child in children.read().split())
+        except (OSError, StopIteration):
+            continue
+    return round(total_kb / 1024, 1) if total_kb else None
+
+
+def stage_totals(metrics_text: str) -> dict:
+    totals = {}
+    for kind, stage, value in STAGE_PATTERN.findall(metrics_text):
+        totals.setdefault(stage, {"sum": 0.0, "count": 0.0})[kind] = float(value)
+    return totals
+
+
+def stage_means(before: dict, after: dict) -> dict:
+    """Mean milliseconds per stage for the calls made during the run"""
+    means = {}
+    for stage, totals in after.items():
+        previous = before.get(stage, {"sum": 0.0, "count": 0.0})
+        calls = totals["count"] - previous["count"]
+        if calls > 0:
+            means[stage] = {"calls": int(calls), "mean_ms": round((totals["sum"] - previous["sum"]) / calls * 1000, 2)}
+    return means
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, workdir: str) -> tuple:
+    """Run the app under uvicorn with the chosen LLM backend; returns (process, base url)"""
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "GEMINI_BACKEND": args.backend,
+        "FAKE_LLM_LATENCY": args.latency,
+        "FAKE_LLM_FAILURE_RATE": str(args.failure_rate),
+        "FAKE_LLM_QUOTA_RATE": str(args.quota_rate),
+        "FAKE_LLM_MALFORMED_RATE": str(args.malformed_rate),
+        "ANALYSIS_CACHE_DB": "",
+        "EXTRACTION_CACHE_DB": os.path.join(workdir, "extractions.db"),
+        "JOBS_DB": os.path.join(workdir, "jobs.db"),
+        "JD_LIBRARY_DB": os.path.join(workdir, "postings.db"),
+        "PROFILES_DB": os.path.join(workdir, "profiles.db"),
+        "LOG_ACCESS": "false",
+    })
+    if args.seed is not None:
+        env["FAKE_LLM_SEED"] = str(args.seed)
+    if args.record or args.replay:
+        env.update({
+            "LLM_RECORD_MODE": "record" if args.record else "replay",
+            "LLM_RECORDINGS": os.path.abspath(args.record or args.replay),
+            # Unique documents make unique prompts; replay answers them from the recordings
+            "LLM_REPLAY_MISS": "any",
+            "LLM_REPLAY_LATENCY_SCALE": str(args.replay_latency),
+        })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{args.app}:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL if args.quiet else None, stderr=subprocess.STDOUT if args.quiet else None,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(client: httpx.AsyncClient, process, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+class LoadGenerator:
+    """Closed-loop load: `concurrency` workers each send the next request as soon as one finishes"""
+
+    def __init__(self, client: httpx.AsyncClient, endpoints: list, resume: bytes, job_description: bytes,
+                 unique: bool, total: int, duration: float):
+        self.client = client
+        self.endpoints = endpoints
+        self.resume = resume
+        self.job_description = job_description
+        self.unique = unique
+        self.total = total
+        self.duration = duration
+        self.sent = 0
+        self.results = {endpoint: {"latencies": [], "statuses": Counter()} for endpoint in endpoints}
+
+    def _documents(self, number: int) -> tuple:
+        resume = self.resume
+        if self.unique:
+            resume += f"\nReference: load-test request {number} at {time.time_ns()}\n".encode()
+        return resume, self.job_description
+
+    async def _send(self, endpoint: str, number: int) -> int:
+        resume, job_description = self._documents(number)
+        if endpoint == "text":
+            response = await self.client.post(ENDPOINTS[endpoint], json={
+                "resume_text": resume.decode("utf-8", "replace"),
+                "job_description": job_description.decode("utf-8", "replace"),
+            })
+        else:
+            response = await self.client.post(ENDPOINTS[endpoint], files={
+                "resume": ("resume.txt", resume, "text/plain"),
+                "job_description": ("job_description.txt", job_description, "text/plain"),
+            })
+        return response.status_code
+
+    async def _worker(self, deadline: float):
+        while time.monotonic() < deadline and (self.total is None or self.sent < self.total):
+            number = self.sent
+            self.sent += 1
+            endpoint = self.endpoints[number % len(self.endpoints)]
+            started = time.perf_counter()
+            try:
+                status = await self._send(endpoint, number)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            result = self.results[endpoint]
+            result["latencies"].append(time.perf_counter() - started)
+            result["statuses"][str(status)] += 1
+
+    async def run(self, concurrency: int) -> float:
+        deadline = time.monotonic() + (self.duration if self.duration else float("inf"))
+        started = time.perf_counter()
+        await asyncio.gather(*(self._worker(deadline) for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+async def sample_memory(pid: int, samples: list, interval: float = 0.5):
+    while True:
+        rss = process_rss_mb(pid)
+        if rss is not None:
+            samples.append(rss)
+        await asyncio.sleep(interval)
+
+
+def endpoint_report(result: dict, elapsed: float) -> dict:
+    latencies = result["latencies"]
+    ok = sum(count for status, count in result["statuses"].items() if status == "200")
+    return {
+        "requests": len(latencies),
+        "ok": ok,
+        "error_rate": round(1 - ok / len(latencies), 4) if latencies else None,
+        "statuses": dict(result["statuses"]),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    with open(args.resume, "rb") as f:
+        resume = f.read()
+    with open(args.job_description, "rb") as f:
+        job_description = f.read()
+    endpoints = ["text", "files"] if args.endpoint == "both" else [args.endpoint]
+
+    with tempfile.TemporaryDirectory(prefix="career-compass-load-") as workdir:
+        process, url = (None, args.url) if args.url else start_server(args, workdir)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        try:
+            async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+                await wait_ready(client, process)
+                if args.warmup:
+                    await LoadGenerator(client, endpoints, resume, job_description, True, args.warmup, None).run(
+                        min(args.concurrency, args.warmup))
+                stages_before = stage_totals((await client.get("/metrics")).text)
+                memory = []
+                rss_start = process_rss_mb(process.pid) if process else None
+                sampler = asyncio.create_task(sample_memory(process.pid, memory)) if process else None
+
+                generator = LoadGenerator(client, endpoints, resume, job_description, not args.cached,
+                                          args.requests if not args.duration else None, args.duration)
+                elapsed = await generator.run(args.concurrency)
+
+                if sampler is not None:
+                    sampler.cancel()
+                stages_after = stage_totals((await client.get("/metrics")).text)
+        finally:
+            if process is not None:
+                process.terminate()
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    all_latencies = {"latencies": [], "statuses": Counter()}
+    for result in generator.results.values():
+        all_latencies["latencies"].extend(result["latencies"])
+        all_latencies["statuses"].update(result["statuses"])
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "app": args.app if not args.url else args.url,
+            "endpoints": [ENDPOINTS[endpoint] for endpoint in endpoints],
+            "concurrency": args.concurrency,
+            "requests": args.requests if not args.duration else None,
+            "duration": args.duration,
+            "unique_documents": not args.cached,
+            "llm": None if args.url else (
+                {"replay": args.replay, "latency_scale": args.replay_latency} if args.replay else {
+                    "backend": args.backend, "record": args.record, "latency": args.latency,
+                    "failure_rate": args.failure_rate, "quota_rate": args.quota_rate,
+                    "malformed_rate": args.malformed_rate,
+                }),
+        },
+        "elapsed_s": round(elapsed, 3),
+        "total": endpoint_report(all_latencies, elapsed),
+        "endpoints": {ENDPOINTS[endpoint]: endpoint_report(result, elapsed) for endpoint, result in generator.results.items()},
+        "server": {
+            "rss_mb_start": rss_start,
+            "rss_mb_peak": max(memory) if memory else None,
+            "rss_mb_end": memory[-1] if memory else None,
+            "stages": stage_means(stages_before, stages_after),
+        },
+        "client": {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=("text", "files", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--requests", type=int, default=400, help="total requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead of a request count")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests sent first")
+    parser.add_argument("--latency", default="lognormal:800,0.5", help="fake Gemini latency spec, see fake_llm.py")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of fake Gemini calls that fail")
+    parser.add_argument("--quota-rate", type=float, default=0.0, help="fraction of fake Gemini calls hitting quota")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of fake responses with broken JSON")
+    parser.add_argument("--seed", type=int, help="seed for the fake LLM")
+    parser.add_argument("--backend", choices=("fake", "gemini"), default="fake",
+                        help="LLM behind the server; gemini needs GEMINI_API_KEY")
+    parser.add_argument("--record", metavar="STORE", help="record the LLM responses to this file")
+    parser.add_argument("--replay", metavar="STORE", help="serve recorded responses instead of calling an LLM")
+    parser.add_argument("--replay-latency", type=float, default=0.0,
+                        help="fraction of the recorded latency to wait when replaying (0 = full speed)")
+    parser.add_argument("--cached", action="store_true", help="send identical documents so caches answer")
+    parser.add_argument("--resume", default=os.path.join(BACKEND_DIR, "dummy_resume.txt"))
+    parser.add_argument("--job-description", default=os.path.join(BACKEND_DIR, "dummy_jd.txt"))
+    parser.add_argument("--app", default="main", help="module to serve: main or simple_server")
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--quiet", action="store_true", help="hide the server's own output")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Caching utilities for Career Compass analysis results and extracted documents
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# Bump whenever the analysis prompt changes so stale results are not served
+PROMPT_VERSION = "v2"
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so cosmetic differences map to the same cache key"""
+    return " ".join(text.split())
+
+
+def analysis_cache_key(resume_text: str, job_description: str, model_name: str,
+                       prompt_version: str = PROMPT_VERSION) -> str:
+    """Content-addressed key for one resume / job description analysis"""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model_name, normalize_text(resume_text), normalize_text(job_description)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def reopen_after_fork(store):
+    """Give each forked worker its own connection to store's SQLite file
+
+    With a preloaded app (start_server.py --production) stores are opened
+    in the master process, and SQLite connections must not be used across
+    fork(). store needs a _connect() method returning a new connection.
+    """
+    ref = weakref.ref(store)
+
+    def reopen():
+        target = ref()
+        if target is not None:
+            # Keep the inherited handle alive; closing it in the child could disturb the parent
+            target._inherited_conn = target._conn
+            target._lock = threading.Lock()
+            target._conn = target._connect()
+
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=reopen)
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with TTL and entry/byte limits"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self._bytes -= size
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, size: int = 1):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (time.time() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key: str):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+
+class SQLiteStore:
+    """Persistent key/value store on SQLite with TTL and LRU eviction.
+
+    Safe to share between worker processes: every write is a short
+    transaction and the database runs in WAL mode.
+    """
+
+    def __init__(self, path: str, table: str = "cache", ttl: float = 86400, max_entries: int = 10000):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        reopen_after_fork(self)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class AnalysisCache:
+    """Two-tier (memory + optional SQLite) cache for Gemini analysis results"""
+
+    def __init__(self, memory: LRUCache, disk: SQLiteStore = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @classmethod
+    def from_env(cls, table: str = "analysis_results") -> "AnalysisCache":
+        ttl = float(os.getenv("ANALYSIS_CACHE_TTL", "3600"))
+        memory = LRUCache(
+            max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl=ttl,
+        )
+        disk = None
+        db_path = os.getenv("ANALYSIS_CACHE_DB")
+        if db_path:
+            disk = SQLiteStore(
+                db_path,
+                table=table,
+                ttl=float(os.getenv("ANALYSIS_CACHE_DISK_TTL", str(ttl * 24))),
+                max_entries=int(os.getenv("ANALYSIS_CACHE_DISK_MAX_ENTRIES", "50000")),
+            )
+        return cls(memory, disk)
+
+    def get(self, key: str):
+        """Return (result, tier) where tier is 'memory', 'disk' or None on a miss"""
+        result = self.memory.get(key)
+        if result is not None:
+            self.hits += 1
+            return result, "memory"
+        if self.disk is not None:
+            raw = self.disk.get(key)
+            if raw is not None:
+                result = json.loads(raw)
+                self.memory.set(key, result, size=len(raw))
+                self.hits += 1
+                self.disk_hits += 1
+                return result, "disk"
+        self.misses += 1
+        return None, None
+
+    def set(self, key: str, result: dict):
+        raw = json.dumps(result)
+        self.memory.set(key, result, size=len(raw))
+        if self.disk is not None:
+            self.disk.set(key, raw)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.total_bytes,
+            "disk_enabled": self.disk is not None,
+        }
+
+
+class DocumentCache:
+    """Cache of extracted upload text keyed by the SHA-256 of the raw bytes.
+
+    The SQLite tier lives on disk so every worker process shares it; a small
+    in-memory LRU sits in front to skip the database on hot documents.
+    """
+
+    def __init__(self, memory: LRUCache, disk: SQLiteStore = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "DocumentCache":
+        memory = LRUCache(
+            max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "256")),
+            max_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+            ttl=float(os.getenv("EXTRACTION_CACHE_TTL", "3600")),
+        )
+        disk = None
+        db_path = os.getenv("EXTRACTION_CACHE_DB", "cache/extractions.db")
+        if db_path:
+            disk = SQLiteStore(
+                db_path,
+                table="extracted_documents",
+                ttl=float(os.getenv("EXTRACTION_CACHE_DISK_TTL", str(7 * 86400))),
+                max_entries=int(os.getenv("EXTRACTION_CACHE_DISK_MAX_ENTRIES", "5000")),
+            )
+        return cls(memory, disk)
+
+    @staticmethod
+    def key(content_hash: str, kind: str) -> str:
+        return f"{kind}:{content_hash}"
+
+    def get(self, content_hash: str, kind: str):
+        key = self.key(content_hash, kind)
+        text = self.memory.get(key)
+        if text is None and self.disk is not None:
+            text = self.disk.get(key)
+            if text is not None:
+                self.memory.set(key, text, size=len(text))
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return text
+
+    def set(self, content_hash: str, kind: str, text: str):
+        key = self.key(content_hash, kind)
+        self.memory.set(key, text, size=len(text))
+        if self.disk is not None:
+            self.disk.set(key, text)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+            "disk_enabled": self.disk is not None,
+        }
@@ -0,0 +1,404 @@
+"""
+Pluggable document extractors for Career Compass
+
+Each supported format (PDF, DOCX, HTML, Markdown, RTF, plain text) has an
+extractor registered under the document kind sniffed from the upload.
+Every extraction reports its cost (time, bytes, characters), and running
+totals per extractor are kept for /health. Plain text is decoded with a
+fast path: BOM check, then strict UTF-8, and only then encoding detection
+on a small sample of the file.
+"""
+import abc
+import asyncio
+import codecs
+import io
+import os
+import re
+import time
+import zipfile
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+
+from pdf_extraction import PDFExtractionError, extract_pdf_text
+
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "200000"))
+# Bytes handed to chardet when a file is not valid UTF-8
+TEXT_SAMPLE_BYTES = int(os.getenv("TEXT_SAMPLE_BYTES", str(32 * 1024)))
+DOCX_MAX_XML_BYTES = 50 * 1024 * 1024
+MARKDOWN_EXTENSIONS = (".md", ".markdown", ".mdown")
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class ExtractionError(Exception):
+    """Raised when a document cannot be parsed"""
+
+
+class UnsupportedDocumentError(Exception):
+    """Raised when no extractor handles the uploaded document type"""
+
+
+def detect_encoding(sample: bytes) -> str:
+    # Imported here: only files that are not UTF-8 need it
+    import chardet
+    detected = chardet.detect(sample)
+    if detected["encoding"] and (detected["confidence"] or 0) >= 0.5:
+        return detected["encoding"]
+    return "cp1252"
+
+
+def decode_text(data: bytes) -> tuple:
+    """Decode bytes to text; returns (text, encoding)
+
+    Most uploads are UTF-8, which a single strict decode validates at C
+    speed. Detection only runs on a sample starting just before the first
+    byte that is not valid UTF-8, so its cost does not grow with the file.
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return data.decode(encoding, errors="replace"), encoding
+    try:
+        return data.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError as e:
+        start = max(0, e.start - 1024)
+        encoding = detect_encoding(data[start:start + TEXT_SAMPLE_BYTES])
+    try:
+        return data.decode(encoding), encoding
+    except (UnicodeDecodeError, LookupError):
+        # latin-1 maps every byte, so this never fails
+        return data.decode("latin-1"), "latin-1"
+
+
+class Extractor(abc.ABC):
+    """Turns an ingested upload into text and keeps running cost totals"""
+
+    name = None
+    kinds = ()
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.total_bytes = 0
+        self.total_chars = 0
+
+    @abc.abstractmethod
+    async def extract(self, document) -> dict:
+        """Return {"text": ...} plus any format-specific details"""
+
+    def record(self, elapsed_ms: float, size: int, chars: int):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.total_bytes += size
+        self.total_chars += chars
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else None,
+            "mb_per_s": round(self.total_bytes / 1000 / self.total_ms, 2) if self.total_ms else None,
+        }
+
+
+class SyncExtractor(Extractor):
+    """Extractor whose parsing is CPU-bound Python, run off the event loop"""
+
+    async def extract(self, document) -> dict:
+        return await asyncio.to_thread(self.parse, document)
+
+    @abc.abstractmethod
+    def parse(self, document) -> dict:
+        """Blocking counterpart of extract(), run in a worker thread"""
+
+
+class PDFExtractor(Extractor):
+    name = "pdf"
+    kinds = ("pdf",)
+
+    async def extract(self, document) -> dict:
+        try:
+            result = await extract_pdf_text(document.source())
+        except PDFExtractionError as e:
+            raise ExtractionError(str(e))
+        return {
+            "text": result["text"],
+            "pages": result["pages"],
+            "total_pages": result["total_pages"],
+            "truncated": result["truncated"],
+        }
+
+
+class TextExtractor(SyncExtractor):
+    name = "text"
+    kinds = ("text",)
+
+    def parse(self, document) -> dict:
+        text, encoding = decode_text(document.read())
+        return {"text": text, "encoding": encoding}
+
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class DocxExtractor(SyncExtractor):
+    name = "docx"
+    kinds = ("docx",)
+
+    def parse(self, document) -> dict:
+        source = document.source()
+        try:
+            with zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source)) as archive:
+                info = archive.getinfo("word/document.xml")
+                if info.file_size > DOCX_MAX_XML_BYTES:
+                    raise ExtractionError("document body is too large")
+                root = ElementTree.fromstring(archive.read(info))
+        except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+            raise ExtractionError(f"invalid DOCX file: {e}")
+
+        paragraphs = []
+        for paragraph in root.iter(f"{_WORD_NS}p"):
+            pieces = []
+            for node in paragraph.iter():
+                if node.tag == f"{_WORD_NS}t":
+                    pieces.append(node.text or "")
+                elif node.tag == f"{_WORD_NS}tab":
+                    pieces.append("\t")
+                elif node.tag in (f"{_WORD_NS}br", f"{_WORD_NS}cr"):
+                    pieces.append("\n")
+            paragraphs.append("".join(pieces))
+        return {"text": "\n".join(paragraphs).strip(), "paragraphs": len(paragraphs)}
+
+
+class _HTMLText(HTMLParser):
+    BLOCK_TAGS = {
+        "p", "div", "br", "li", "tr", "td", "th", "ul", "ol", "table", "section", "article",
+        "header", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "title", "dt", "dd", "blockquote", "pre",
+    }
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skipping += 1
+        elif tag == "li":
+            self.parts.append("\n- ")
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def _tidy_lines(text: str) -> str:
+    """Collapse runs of whitespace and blank lines left by markup removal"""
+    lines = (re.sub(r"[ \t\xa0]+", " ", line).strip() for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+class HTMLExtractor(SyncExtractor):
+    name = "html"
+    kinds = ("html",)
+
+    def parse(self, document) -> dict:
+        markup, encoding = decode_text(document.read())
+        parser = _HTMLText()
+        parser.feed(markup)
+        parser.close()
+        return {"text": _tidy_lines("".join(parser.parts)), "encoding": encoding}
+
+
+_MARKDOWN_RULES = (
+    (re.compile(r"^\s{0,3}(```|~~~).*$", re.M), ""),
+    (re.compile(r"!\[([^\]]*)\]\([^)]*\)"), r"\1"),
+    (re.compile(r"\[([^\]]+)\]\([^)]*\)"), r"\1"),
+    (re.compile(r"^\s{0,3}#{1,6}\s*(.*?)[\s#]*$", re.M), r"\1"),
+    (re.compile(r"^\s{0,3}>\s?", re.M), ""),
+    (re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$", re.M), ""),
+    (re.compile(r"(\*\*|__)(.+?)\1"), r"\2"),
+    (re.compile(r"(?<![\w*])\*(?![\s*])(.+?)(?<![\s*])\*(?![\w*])"), r"\1"),
+    (re.compile(r"`([^`\n]+)`"), r"\1"),
+    (re.compile(r"<[^>\n]+>"), ""),
+)
+
+
+class MarkdownExtractor(SyncExtractor):
+    name = "markdown"
+    kinds = ("markdown",)
+
+    def parse(self, document) -> dict:
+        text, encoding = decode_text(document.read())
+        for pattern, replacement in _MARKDOWN_RULES:
+            text = pattern.sub(replacement, text)
+        return {"text": _tidy_lines(text), "encoding": encoding}
+
+
+_RTF_TOKEN = re.compile(
+    r"\\([a-zA-Z]{1,32})(-?\d{1,10})? ?|\\'([0-9a-fA-F]{2})|\\([^a-zA-Z])|([{}])|[\r\n]+|(.)",
+    re.S,
+)
+# Groups whose content is metadata, not document text
+_RTF_DESTINATIONS = {
+    "fonttbl", "colortbl", "stylesheet", "info", "pict", "object", "header", "footer", "headerl",
+    "headerr", "headerf", "footerl", "footerr", "footerf", "themedata", "colorschememapping",
+    "datastore", "latentstyles", "listtable", "listoverridetable", "rsidtbl", "generator",
+    "xmlnstbl", "fldinst", "filetbl", "revtbl", "pgdsctbl", "mmathPr", "bkmkstart", "bkmkend",
+}
+_RTF_SYMBOLS = {
+    "par": "\n", "line": "\n", "sect": "\n\n", "page": "\n\n", "tab": "\t", "cell": "\t",
+    "row": "\n", "emdash": "\u2014", "endash": "\u2013", "bullet": "\u2022", "lquote": "\u2018",
+    "rquote": "\u2019", "ldblquote": "\u201c", "rdblquote": "\u201d", "emspace": " ", "enspace": " ",
+}
+
+
+def rtf_to_text(data: bytes) -> str:
+    """Strip RTF control words and groups, decoding \\'hh and \\u escapes"""
+    source = data.decode("latin-1")
+    codepage = re.search(r"\\ansicpg(\d+)", source[:2048])
+    codepage = f"cp{codepage.group(1)}" if codepage else "cp1252"
+    out = []
+    pending = bytearray()
+    stack = []
+    ignorable = False
+    unicode_skip = 1
+    skip = 0
+    for word, argument, hexcode, symbol, brace, char in _RTF_TOKEN.findall(source):
+        if pending and not hexcode and (word or symbol or brace or char):
+            out.append(pending.decode(codepage, errors="replace"))
+            pending.clear()
+        if brace:
+            skip = 0
+            if brace == "{":
+                stack.append((unicode_skip, ignorable))
+            elif stack:
+                unicode_skip, ignorable = stack.pop()
+        elif symbol:
+            skip = 0
+            if symbol == "*":
+                ignorable = True
+            elif not ignorable and symbol in "{}\\":
+                out.append(symbol)
+            elif not ignorable and symbol == "~":
+                out.append("\xa0")
+            elif not ignorable and symbol == "_":
+                out.append("-")
+        elif word:
+            skip = 0
+            if word in _RTF_DESTINATIONS:
+                ignorable = True
+            elif word == "uc":
+                unicode_skip = int(argument or 1)
+            elif ignorable:
+                continue
+            elif word in _RTF_SYMBOLS:
+                out.append(_RTF_SYMBOLS[word])
+            elif word == "u" and argument:
+                code = int(argument)
+                out.append(chr(code + 0x10000 if code < 0 else code))
+                skip = unicode_skip
+        elif hexcode:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                pending.append(int(hexcode, 16))
+        elif char:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                out.append(char)
+    if pending:
+        out.append(pending.decode(codepage, errors="replace"))
+    return "".join(out)
+
+
+class RTFExtractor(SyncExtractor):
+    name = "rtf"
+    kinds = ("rtf",)
+
+    def parse(self, document) -> dict:
+        return {"text": _tidy_lines(rtf_to_text(document.read()))}
+
+
+EXTRACTORS = {}
+
+
+def register(extractor: Extractor) -> Extractor:
+    """Make an extractor responsible for its document kinds"""
+    for kind in extractor.kinds:
+        EXTRACTORS[kind] = extractor
+    return extractor
+
+
+for _extractor in (PDFExtractor(), DocxExtractor(), HTMLExtractor(), MarkdownExtractor(), RTFExtractor(), TextExtractor()):
+    register(_extractor)
+
+
+def resolve_kind(document) -> str:
+    """Refine the sniffed kind into the extractor kind, or None if unsupported
+
+    ZIP containers are accepted when they hold a Word document; Markdown
+    has no magic bytes, so text files are treated as Markdown by extension.
+    """
+    kind = document.kind
+    if kind == "zip":
+        source = document.source()
+        try:
+            with zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source)) as archive:
+                kind = "docx" if "word/document.xml" in archive.namelist() else None
+        except zipfile.BadZipFile:
+            kind = None
+    elif kind == "text" and document.filename.lower().endswith(MARKDOWN_EXTENSIONS):
+        kind = "markdown"
+    return kind if kind in EXTRACTORS else None
+
+
+async def extract_document(document, kind: str = None) -> dict:
+    """Extract text from an ingested upload with the extractor for its kind
+
+    Returns the extractor's output plus its cost: extractor, elapsed_ms,
+    bytes and chars. Text beyond EXTRACT_MAX_CHARS is cut off.
+    """
+    kind = kind or resolve_kind(document)
+    extractor = EXTRACTORS.get(kind)
+    if extractor is None:
+        raise UnsupportedDocumentError(f"Unsupported document type: {document.kind}")
+    started = time.perf_counter()
+    try:
+        result = await extractor.extract(document)
+    except Exception:
+        extractor.errors += 1
+        raise
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if len(result["text"]) > EXTRACT_MAX_CHARS:
+        result["text"] = result["text"][:EXTRACT_MAX_CHARS]
+        result["truncated"] = True
+    extractor.record(elapsed_ms, document.size, len(result["text"]))
+    result.update({
+        "extractor": extractor.name,
+        "elapsed_ms": round(elapsed_ms, 2),
+        "bytes": document.size,
+        "chars": len(result["text"]),
+    })
+    return result
+
+
+def extractor_stats() -> dict:
+    return {extractor.name: extractor.stats() for extractor in EXTRACTORS.values()}
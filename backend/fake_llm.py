@@ -0,0 +1,127 @@
+"""
+Local stand-in for Gemini, for load tests and benchmarks
+
+With GEMINI_BACKEND=fake the model registry builds FakeGenerativeModel
+objects instead of real Gemini clients. They answer with a plausible
+analysis JSON after a latency drawn from FAKE_LLM_LATENCY, and fail
+(FAKE_LLM_FAILURE_RATE), hit quota (FAKE_LLM_QUOTA_RATE) or return
+truncated JSON (FAKE_LLM_MALFORMED_RATE) at the configured rates. No
+network calls and no API key are needed.
+
+Latency specs, in milliseconds:
+    fixed:800               always 800 ms
+    uniform:200,1500        uniform between 200 and 1500 ms
+    normal:800,200          mean 800, standard deviation 200 (clipped at 0)
+    lognormal:800,0.5       median 800, sigma 0.5 (long right tail, like real LLM calls)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+
+LATENCY_DISTRIBUTIONS = {
+    "fixed": lambda rng, value: value,
+    "uniform": lambda rng, low, high: rng.uniform(low, high),
+    "normal": lambda rng, mean, std: max(rng.gauss(mean, std), 0.0),
+    "lognormal": lambda rng, median, sigma: rng.lognormvariate(0, sigma) * median,
+}
+
+FEEDBACK = (
+    "The candidate's background lines up with the core of the role: hands-on backend work, "
+    "API design and cloud deployment are all covered, and the projects show ownership from "
+    "design through release. The gaps are mostly in areas the posting lists as required but "
+    "the resume mentions only in passing, so they read as exposure rather than experience. "
+)
+
+
+class FakeLLMError(Exception):
+    """A transient backend error"""
+
+
+class ResourceExhausted(Exception):
+    """Quota error; named like the SDK's so is_quota_error() treats it the same"""
+
+    code = 429
+
+
+def parse_latency(spec: str):
+    """Turn a latency spec such as 'lognormal:800,0.5' into a sampler returning seconds"""
+    name, _, args = spec.partition(":")
+    distribution = LATENCY_DISTRIBUTIONS.get(name.strip())
+    if distribution is None:
+        raise ValueError(f"Unknown latency distribution {name!r}, expected one of {sorted(LATENCY_DISTRIBUTIONS)}")
+    values = [float(value) for value in args.split(",") if value.strip()]
+    return lambda rng: distribution(rng, *values) / 1000
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _StreamedResponse:
+    def __init__(self, chunks: list, delay: float):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield _Chunk(chunk)
+
+
+class FakeGenerativeModel:
+    """Quacks like genai.GenerativeModel for the calls LLMClient makes"""
+
+    def __init__(self, model_name: str, generation_config: dict = None, latency: str = None,
+                 failure_rate: float = None, quota_rate: float = None, malformed_rate: float = None,
+                 stream_chunks: int = 8, seed: int = None):
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.latency = parse_latency(latency or os.getenv("FAKE_LLM_LATENCY", "lognormal:800,0.5"))
+        self.failure_rate = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")) if failure_rate is None else failure_rate
+        self.quota_rate = float(os.getenv("FAKE_LLM_QUOTA_RATE", "0")) if quota_rate is None else quota_rate
+        self.malformed_rate = float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0")) if malformed_rate is None else malformed_rate
+        self.stream_chunks = stream_chunks
+        if seed is None and os.getenv("FAKE_LLM_SEED"):
+            seed = int(os.getenv("FAKE_LLM_SEED"))
+        self.rng = random.Random(seed)
+
+    def respond(self, prompt: str) -> str:
+        """Analysis JSON whose score depends only on the prompt"""
+        digest = hashlib.sha256(prompt.encode("utf-8", "replace")).digest()
+        text = json.dumps({
+            "fit_score": 40 + digest[0] % 55,
+            "feedback": FEEDBACK * 3,
+            "skills_match": {"matched": ["Python", "REST APIs", "Docker", "PostgreSQL"], "missing": ["Kubernetes", "GraphQL"]},
+            "improvement_suggestions": [
+                "Quantify the impact of the backend projects (latency, traffic, cost)",
+                "Add the Kubernetes work from side projects to the skills section",
+                "Move the most relevant experience above education",
+            ],
+            "missing_skills": ["Kubernetes", "GraphQL"],
+        }, indent=2)
+        if self.rng.random() < self.malformed_rate:
+            text = "```json\n" + text[:len(text) * 2 // 3]
+        return text
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        latency = self.latency(self.rng)
+        roll = self.rng.random()
+        if roll < self.quota_rate:
+            await asyncio.sleep(latency / 10)
+            raise ResourceExhausted(f"429 Quota exceeded for {self.model_name} (fake)")
+        if roll < self.quota_rate + self.failure_rate:
+            await asyncio.sleep(latency / 2)
+            raise FakeLLMError(f"503 {self.model_name} unavailable (fake)")
+
+        text = self.respond(prompt)
+        if not stream:
+            await asyncio.sleep(latency)
+            return _Chunk(text)
+        # Time to first chunk is a quarter of the latency, the rest is spread over the chunks
+        await asyncio.sleep(latency / 4)
+        size = -(-len(text) // self.stream_chunks)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        return _StreamedResponse(chunks, latency * 3 / 4 / len(chunks))
@@ -0,0 +1,194 @@
+"""
+Persistent job-description library with a skill inverted index
+
+Postings are stored once in SQLite together with their extracted skills.
+An in-memory inverted index (skill -> postings) lets a resume be ranked
+against the whole library with the local scorer in milliseconds, so
+Gemini is only needed to rerank the best few matches. Each worker
+process keeps its own copy and picks up postings added or removed by
+other workers when the database's data_version moves.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from cache import reopen_after_fork
+from local_analyzer import analyze_locally, get_taxonomy
+
+# Candidates scored with the full local analysis after the skill-coverage pass
+RERANK_POOL = int(os.getenv("JD_LIBRARY_RERANK_POOL", "50"))
+
+
+class JobLibrary:
+    """SQLite-backed store of job postings with a skill inverted index"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = self._connect()
+        reopen_after_fork(self)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, text TEXT NOT NULL, "
+            "skills TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS posting_skills ("
+            "skill TEXT NOT NULL, posting_id INTEGER NOT NULL, mentions INTEGER NOT NULL, "
+            "PRIMARY KEY (skill, posting_id))"
+        )
+        self._postings = {}   # id -> {"title", "text", "skills": Counter}
+        self._index = {}      # skill -> {posting_id: mentions}
+        with self._lock:
+            self._sync()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # data_version is per connection, so a new connection (e.g. after fork) always resyncs
+        self._data_version = None
+        return conn
+
+    def _sync(self):
+        """Apply postings other processes added or removed since the last check (call with _lock held)
+
+        PRAGMA data_version changes whenever another connection commits, so
+        the common case costs one pragma and no table reads.
+        """
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        stored = {row[0] for row in self._conn.execute("SELECT id FROM postings")}
+        for posting_id in set(self._postings) - stored:
+            self._forget(posting_id)
+        new = sorted(stored - set(self._postings))
+        for start in range(0, len(new), 500):
+            self._load(new[start:start + 500])
+
+    def _load(self, posting_ids: list):
+        placeholders = ",".join("?" * len(posting_ids))
+        skills = {posting_id: Counter() for posting_id in posting_ids}
+        for posting_id, skill, mentions in self._conn.execute(
+            f"SELECT posting_id, skill, mentions FROM posting_skills WHERE posting_id IN ({placeholders})", posting_ids
+        ):
+            skills[posting_id][skill] = mentions
+        for posting_id, title, text in self._conn.execute(
+            f"SELECT id, title, text FROM postings WHERE id IN ({placeholders})", posting_ids
+        ):
+            self._remember(posting_id, title, text, skills[posting_id])
+
+    def _remember(self, posting_id: int, title: str, text: str, skills: Counter):
+        self._postings[posting_id] = {"title": title, "text": text, "skills": skills}
+        for skill, mentions in skills.items():
+            self._index.setdefault(skill, {})[posting_id] = mentions
+
+    def _forget(self, posting_id: int):
+        posting = self._postings.pop(posting_id, None)
+        if posting is None:
+            return None
+        for skill in posting["skills"]:
+            postings = self._index.get(skill, {})
+            postings.pop(posting_id, None)
+            if not postings:
+                self._index.pop(skill, None)
+        return posting
+
+    def add(self, title: str, text: str) -> dict:
+        """Store a posting and index its skills"""
+        skills = get_taxonomy().extract(text)
+        with self._lock:
+            self._sync()
+            # One transaction, so other workers never see a posting without its skills
+            with self._conn:
+                self._conn.execute("BEGIN")
+                cursor = self._conn.execute(
+                    "INSERT INTO postings (title, text, skills, created_at) VALUES (?, ?, ?, ?)",
+                    (title, text, json.dumps(skills), time.time()),
+                )
+                posting_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO posting_skills (skill, posting_id, mentions) VALUES (?, ?, ?)",
+                    [(skill, posting_id, mentions) for skill, mentions in skills.items()],
+                )
+            self._remember(posting_id, title, text, skills)
+        return {"id": posting_id, "title": title, "skills": sorted(skills)}
+
+    def remove(self, posting_id: int) -> bool:
+        with self._lock:
+            self._sync()
+            if self._forget(posting_id) is None:
+                return False
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute("DELETE FROM postings WHERE id = ?", (posting_id,))
+                self._conn.execute("DELETE FROM posting_skills WHERE posting_id = ?", (posting_id,))
+        return True
+
+    def get(self, posting_id: int):
+        with self._lock:
+            self._sync()
+            return self._postings.get(posting_id)
+
+    def list(self) -> list:
+        with self._lock:
+            self._sync()
+            postings = sorted(self._postings.items())
+        return [
+            {"id": posting_id, "title": posting["title"], "skills": sorted(posting["skills"])}
+            for posting_id, posting in postings
+        ]
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return len(self._postings)
+
+    def top_k(self, resume_text: str, k: int = 5) -> list:
+        """Rank library postings for a resume using only the local scorer"""
+        resume_skills = get_taxonomy().extract(resume_text)
+
+        # Skill-coverage pass over the postings that share at least one skill
+        with self._lock:
+            self._sync()
+            candidates = {
+                posting_id
+                for skill in resume_skills
+                for posting_id in self._index.get(skill, {})
+            }
+            if not candidates:
+                candidates = set(self._postings)
+            candidates = sorted(candidates)
+            posting_skills = [self._postings[posting_id]["skills"] for posting_id in candidates]
+        coverage = np.zeros(len(candidates))
+        for row, skills in enumerate(posting_skills):
+            if skills:
+                weights = 1 + np.log(np.fromiter(skills.values(), dtype=float))
+                present = np.fromiter((skill in resume_skills for skill in skills), dtype=float)
+                coverage[row] = weights @ present / weights.sum()
+        pool_size = min(len(candidates), max(k, RERANK_POOL))
+        pool = np.argsort(-coverage, kind="stable")[:pool_size]
+
+        # Full local analysis (coverage + TF-IDF) on the best candidates only
+        ranked = []
+        for row in pool:
+            posting_id = candidates[row]
+            posting = self._postings.get(posting_id)
+            if posting is None:
+                continue
+            analysis = analyze_locally(resume_text, posting["text"], resume_skills=resume_skills, jd_skills=posting["skills"])
+            ranked.append({
+                "id": posting_id,
+                "title": posting["title"],
+                "fit_score": analysis["fit_score"],
+                "matched_skills": analysis["skills_match"]["matched"],
+                "missing_skills": analysis["missing_skills"],
+            })
+        ranked.sort(key=lambda item: item["fit_score"], reverse=True)
+        return ranked[:k]
@@ -0,0 +1,362 @@
+"""
+Persistent analysis job queue with a background worker pool
+
+Jobs are stored in SQLite so they survive restarts and can be shared by
+several server processes. A worker claims a job by taking a lease on it
+and renews the lease while the job runs; if the process dies mid-job the
+lease expires and another worker picks the job up again, unless it has
+used up its attempts. Failed jobs are retried with exponential backoff.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from cache import reopen_after_fork
+
+log = logging.getLogger("career_compass.jobs")
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class RetryableJobError(Exception):
+    """Raised by a job handler when the job should be retried later"""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """SQLite-backed queue of analysis jobs"""
+
+    def __init__(self, path: str, max_attempts: int = 3, retry_base: float = 5.0,
+                 retry_max: float = 300.0, lease: float = 300.0, retention: float = 86400.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._events = {}  # job id -> [asyncio.Event, waiter count] for long-polls in this process
+        self.wakeup = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = self._connect()
+        reopen_after_fork(self)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, payload TEXT NOT NULL, "
+            "result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "available_at REAL NOT NULL, lease_until REAL, lease_token TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "lease_token" not in columns:
+            # Queues created before leases carried a token
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_token TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        return cls(
+            os.getenv("JOBS_DB", "jobs/jobs.db"),
+            max_attempts=int(os.getenv("JOBS_MAX_ATTEMPTS", "3")),
+            retry_base=float(os.getenv("JOBS_RETRY_BASE", "5")),
+            retry_max=float(os.getenv("JOBS_RETRY_MAX", "300")),
+            lease=float(os.getenv("JOBS_LEASE", "300")),
+            retention=float(os.getenv("JOBS_RETENTION", "86400")),
+        )
+
+    def submit(self, kind: str, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, available_at, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now, now),
+            )
+        if self.wakeup is not None:
+            self.wakeup.set()
+        return job_id
+
+    def claim(self):
+        """Lease the next runnable job; returns (id, kind, payload, attempt, lease_token) or None
+
+        The lease token must be passed back to renew, complete, fail or
+        release the job, so a worker whose lease expired cannot overwrite
+        the outcome of the worker that reclaimed the job.
+
+        Running jobs whose lease expired (their worker died) are runnable
+        again, or failed once they have had max_attempts attempts.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', payload = '{}', lease_until = NULL, lease_token = NULL, updated_at = ?, "
+                    "error = 'Lease expired after ' || attempts || ' attempts' "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    "SELECT id, kind, payload, attempts FROM jobs "
+                    "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY available_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                token = uuid.uuid4().hex
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, lease_token = ?, "
+                        "updated_at = ? WHERE id = ?",
+                        (now + self.lease, token, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row["id"], row["kind"], json.loads(row["payload"]), row["attempts"] + 1, token
+
+    def renew(self, job_id: str, token: str) -> bool:
+        """Extend a running job's lease; False if the lease was lost"""
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = 'running' AND lease_token = ?",
+                (now + self.lease, now, job_id, token),
+            ).rowcount > 0
+
+    def complete(self, job_id: str, token: str, result: dict) -> bool:
+        """Store a job's result; False if the lease was lost and nothing was written"""
+        return self._finish(job_id, token, "done", result=json.dumps(result))
+
+    def fail(self, job_id: str, token: str, attempt: int, error: str, retryable: bool = True,
+             retry_after: float = None) -> bool:
+        """Record a failed attempt, scheduling a retry with exponential backoff if attempts remain
+
+        Returns False if the lease was lost and nothing was written.
+        """
+        if retryable and attempt < self.max_attempts:
+            delay = min(self.retry_base * 2 ** (attempt - 1), self.retry_max)
+            delay = max(delay, retry_after or 0)
+            now = time.time()
+            with self._lock:
+                return self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, available_at = ?, lease_until = NULL, "
+                    "lease_token = NULL, updated_at = ? WHERE id = ? AND status = 'running' AND lease_token = ?",
+                    (error, now + delay, now, job_id, token),
+                ).rowcount > 0
+        return self._finish(job_id, token, "failed", error=error)
+
+    def release(self, job_id: str, token: str) -> bool:
+        """Put a job back without counting the attempt (graceful shutdown)"""
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = attempts - 1, available_at = ?, lease_until = NULL, "
+                "lease_token = NULL, updated_at = ? WHERE id = ? AND status = 'running' AND lease_token = ?",
+                (now, now, job_id, token),
+            ).rowcount > 0
+
+    def _finish(self, job_id: str, token: str, status: str, result: str = None, error: str = None) -> bool:
+        with self._lock:
+            finished = self._conn.execute(
+                # Finished jobs keep only their result; the submitted documents are dropped
+                "UPDATE jobs SET status = ?, payload = '{}', result = ?, error = ?, lease_until = NULL, "
+                "lease_token = NULL, updated_at = ? WHERE id = ? AND status = 'running' AND lease_token = ?",
+                (status, result, error, time.time(), job_id, token),
+            ).rowcount > 0
+        waiters = self._events.get(job_id)
+        if finished and waiters is not None:
+            waiters[0].set()
+        return finished
+
+    def get(self, job_id: str):
+        row = self._conn.execute(
+            "SELECT id, kind, status, result, error, attempts, available_at, created_at, updated_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        if row["status"] == "done":
+            job["result"] = json.loads(row["result"])
+        elif row["error"]:
+            job["error"] = row["error"]
+            if row["status"] == "queued":
+                job["retry_at"] = row["available_at"]
+        return job
+
+    async def wait(self, job_id: str, timeout: float, poll_interval: float = 1.0):
+        """Long-poll: return the job once it is finished or timeout expires
+
+        Jobs finished by this process wake the waiter immediately; jobs run
+        by another process are noticed on the next poll.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiters = self._events.setdefault(job_id, [asyncio.Event(), 0])
+        waiters[1] += 1
+        try:
+            while True:
+                job = self.get(job_id)
+                remaining = deadline - loop.time()
+                if job is None or job["status"] in TERMINAL_STATUSES or remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(waiters[0].wait(), timeout=min(poll_interval, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            waiters[1] -= 1
+            if waiters[1] == 0:
+                self._events.pop(job_id, None)
+
+    def depth(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def purge(self) -> int:
+        """Delete finished jobs older than the retention period"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - self.retention,),
+            )
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        oldest = self._conn.execute(
+            "SELECT MIN(created_at) FROM jobs WHERE status = 'queued' AND available_at <= ?", (time.time(),)
+        ).fetchone()[0]
+        return {
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_queued_seconds": round(time.time() - oldest, 1) if oldest else 0,
+        }
+
+
+class JobWorkerPool:
+    """asyncio workers that drain a JobQueue with a handler per job kind
+
+    Handlers are called with (payload, attempt), attempt counting from 1.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: dict, workers: int = 4, poll_interval: float = 1.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.busy = 0
+        self.processed = 0
+        self.retried = 0
+        self._tasks = []
+        self._stopping = False
+
+    def start(self):
+        self.queue.wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.ensure_future(self._run(index)) for index in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._purge_periodically()))
+
+    async def stop(self, drain: float = 0):
+        """Stop claiming jobs, give running ones up to drain seconds, then cancel (and release) the rest"""
+        self._stopping = True
+        if drain > 0 and self.busy:
+            log.info("draining running jobs", extra={"running": self.busy, "drain_seconds": drain})
+            self.queue.wakeup.set()
+            await asyncio.wait(self._tasks[:self.workers], timeout=drain)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, index: int):
+        while not self._stopping:
+            claimed = self.queue.claim()
+            if claimed is None:
+                self.queue.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.queue.wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(*claimed)
+
+    async def _process(self, job_id: str, kind: str, payload: dict, attempt: int, token: str):
+        handler = self.handlers.get(kind)
+        self.busy += 1
+        heartbeat = asyncio.ensure_future(self._renew_lease(job_id, token))
+        recorded = True
+        try:
+            if handler is None:
+                recorded = self.queue.fail(job_id, token, attempt, f"Unknown job kind: {kind}", retryable=False)
+                return
+            result = await handler(payload, attempt)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job to the next worker without burning an attempt
+            self.queue.release(job_id, token)
+            raise
+        except RetryableJobError as e:
+            log.warning("job attempt failed", extra={"job_id": job_id, "attempt": attempt, "error": str(e)})
+            recorded = self.queue.fail(job_id, token, attempt, str(e), retry_after=e.retry_after)
+            self.retried += recorded and attempt < self.queue.max_attempts
+        except Exception as e:
+            log.warning("job failed", extra={"job_id": job_id, "attempt": attempt, "error": str(e)})
+            recorded = self.queue.fail(job_id, token, attempt, str(e), retryable=False)
+        else:
+            recorded = self.queue.complete(job_id, token, result)
+            self.processed += recorded
+        finally:
+            heartbeat.cancel()
+            self.busy -= 1
+            if not recorded:
+                log.warning("job lease lost, outcome discarded", extra={"job_id": job_id, "attempt": attempt})
+
+    async def _renew_lease(self, job_id: str, token: str):
+        # Keep the lease well ahead of expiry so a slow job is not handed to a second worker
+        while True:
+            await asyncio.sleep(self.queue.lease / 3)
+            if not self.queue.renew(job_id, token):
+                return
+
+    async def _purge_periodically(self):
+        while True:
+            await asyncio.sleep(3600)
+            removed = self.queue.purge()
+            if removed:
+                log.info("purged finished jobs", extra={"removed": removed})
+
+    def stats(self) -> dict:
+        return {
+            **self.queue.stats(),
+            "workers": self.workers,
+            "busy_workers": self.busy,
+            "processed": self.processed,
+            "retried": self.retried,
+        }
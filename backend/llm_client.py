@@ -0,0 +1,216 @@
+"""
+Async Gemini client with bounded concurrency, timeouts and disconnect handling
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, Request
+
+from llm_recorder import ResponseRecorder
+from model_registry import ModelRegistry
+
+log = logging.getLogger("career_compass.llm")
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a Gemini call exceeds its time budget"""
+
+
+class Completion(str):
+    """Response text that remembers which model in the fallback chain produced it"""
+
+    def __new__(cls, text: str, model: str):
+        completion = super().__new__(cls, text)
+        completion.model = model
+        return completion
+
+
+class LLMClient:
+    """Runs Gemini calls without blocking the event loop.
+
+    Uses the SDK's native async API when available and otherwise falls
+    back to a dedicated thread pool, so a slow call never stalls other
+    requests on the same worker. A semaphore caps in-flight calls, and
+    models come from the registry's fallback chain: a failing model is
+    skipped in favour of the next one, all within one LLM_TIMEOUT budget.
+    Responses are Completions naming the model that answered. With a
+    recorder, responses are recorded, or replayed without calling Gemini.
+    """
+
+    def __init__(self, registry: ModelRegistry, max_concurrency: int = None, timeout: float = None,
+                 recorder: ResponseRecorder = None):
+        self.registry = registry
+        self.recorder = recorder
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "60"))
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._executor = None
+
+    @property
+    def model_name(self) -> str:
+        return self.registry.primary
+
+    @property
+    def replaying(self) -> bool:
+        return self.recorder is not None and self.recorder.replaying
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="gemini")
+        return self._executor
+
+    def _timeout_error(self) -> LLMTimeoutError:
+        return LLMTimeoutError(f"Gemini call timed out after {self.timeout:g}s")
+
+    async def _call(self, model, prompt: str, stream: bool = False):
+        if hasattr(model, "generate_content_async"):
+            return await model.generate_content_async(prompt, stream=stream)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), model.generate_content, prompt)
+
+    async def generate(self, prompt: str) -> Completion:
+        """Send a prompt to Gemini and return the response text
+
+        The timeout covers the whole fallback chain, so a model tried after
+        a failure only gets what is left of it.
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                if self.replaying:
+                    recording = self.recorder.lookup(prompt)
+                    return Completion(await self.recorder.replay(recording), recording.model)
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.timeout
+                last_error = None
+                for name in self.registry.candidates():
+                    started = time.perf_counter()
+                    try:
+                        response = await asyncio.wait_for(
+                            self._call(self.registry.get(name), prompt), timeout=max(deadline - loop.time(), 0)
+                        )
+                        text = response.text
+                    except asyncio.TimeoutError:
+                        # The time budget is spent; do not start another model
+                        self.registry.record_failure(name, self._timeout_error())
+                        raise self._timeout_error()
+                    except Exception as e:
+                        self.registry.record_failure(name, e)
+                        log.warning("model call failed", extra={"model": name, "error": str(e)})
+                        last_error = e
+                        continue
+                    latency = time.perf_counter() - started
+                    self.registry.record_success(name, latency)
+                    if self.recorder is not None:
+                        self.recorder.record(prompt, name, text, latency)
+                    return Completion(text, name)
+                raise last_error
+            finally:
+                self.in_flight -= 1
+
+    async def stream(self, prompt: str):
+        """Yield Gemini response text chunks (Completions) as they arrive.
+
+        The timeout applies to the whole stream, fallbacks included. A model
+        that fails before producing any output is replaced by the next one
+        in the chain. Without the async SDK the full response is one chunk.
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                if self.replaying:
+                    recording = self.recorder.lookup(prompt)
+                    async for chunk in self.recorder.replay_stream(recording):
+                        yield Completion(chunk, recording.model)
+                    return
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.timeout
+                last_error = None
+                for name in self.registry.candidates():
+                    started = time.perf_counter()
+                    produced = False
+                    first_chunk = None
+                    parts = []
+                    try:
+                        response = await asyncio.wait_for(
+                            self._call(self.registry.get(name), prompt, stream=True),
+                            timeout=max(deadline - loop.time(), 0)
+                        )
+                        if not hasattr(response, "__aiter__"):
+                            produced = True
+                            parts.append(response.text)
+                            yield Completion(response.text, name)
+                        else:
+                            chunks = response.__aiter__()
+                            while True:
+                                try:
+                                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0))
+                                except StopAsyncIteration:
+                                    break
+                                if chunk.text:
+                                    if not produced:
+                                        first_chunk = time.perf_counter() - started
+                                    produced = True
+                                    parts.append(chunk.text)
+                                    yield Completion(chunk.text, name)
+                    except asyncio.TimeoutError:
+                        self.registry.record_failure(name, self._timeout_error())
+                        raise self._timeout_error()
+                    except Exception as e:
+                        self.registry.record_failure(name, e)
+                        log.warning("model call failed", extra={"model": name, "error": str(e), "streamed": produced})
+                        if produced:
+                            raise
+                        last_error = e
+                        continue
+                    latency = time.perf_counter() - started
+                    self.registry.record_success(name, latency)
+                    if self.recorder is not None:
+                        self.recorder.record(prompt, name, "".join(parts), latency, first_chunk, [len(part) for part in parts])
+                    return
+                raise last_error
+            finally:
+                self.in_flight -= 1
+
+    async def drain(self, timeout: float) -> int:
+        """Wait up to timeout seconds for in-flight calls to finish; returns how many are left"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.in_flight and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+        return self.in_flight
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "timeout": self.timeout,
+            "registry": self.registry.as_dict(),
+            "recorder": self.recorder.stats() if self.recorder is not None else None,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+async def cancel_on_disconnect(request: Request, coro, poll_interval: float = 0.5):
+    """Await coro, cancelling it if the HTTP client goes away in the meantime"""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
@@ -0,0 +1,159 @@
+"""
+Record/replay of Gemini responses at the LLM client boundary
+
+LLM_RECORD_MODE=record stores every successful response under the
+SHA-256 of its prompt, in a small SQLite file with zlib-compressed text.
+LLM_RECORD_MODE=replay answers from that file and makes no Gemini calls,
+so the upload -> extract -> prompt -> parse path runs offline and
+deterministically (CI, profiling, load tests). Replay is instant by
+default; LLM_REPLAY_LATENCY_SCALE=1 waits as long as the recorded call took.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from cache import reopen_after_fork
+
+log = logging.getLogger("career_compass.llm")
+
+
+class ReplayMissError(Exception):
+    """No recorded response for a prompt in replay mode"""
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8", "replace")).hexdigest()
+
+
+class Recording:
+    __slots__ = ("model", "text", "latency", "first_chunk", "chunks")
+
+    def __init__(self, model: str, text: str, latency: float, first_chunk: float = None, chunks: list = None):
+        self.model = model
+        self.text = text
+        self.latency = latency
+        self.first_chunk = first_chunk
+        self.chunks = chunks
+
+
+class ResponseRecorder:
+    """Writes responses in record mode, serves them in replay mode
+
+    In replay mode every recording is loaded into memory up front. A prompt
+    that was never recorded raises ReplayMissError, or with on_miss="any"
+    gets a recorded response picked by prompt hash, which keeps load tests
+    with unique documents going.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 0.0, on_miss: str = "error"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"LLM_RECORD_MODE must be record or replay, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.on_miss = on_miss
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = self._connect()
+        reopen_after_fork(self)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "prompt_hash TEXT PRIMARY KEY, model TEXT NOT NULL, response BLOB NOT NULL, "
+            "latency REAL NOT NULL, first_chunk REAL, chunks TEXT, recorded_at REAL NOT NULL)"
+        )
+        self._recordings = {}
+        self._keys = []
+        if mode == "replay":
+            self._load()
+
+    @classmethod
+    def from_env(cls):
+        """The configured recorder, or None when LLM_RECORD_MODE is unset/off"""
+        mode = os.getenv("LLM_RECORD_MODE", "off").lower()
+        if mode in ("", "off"):
+            return None
+        return cls(
+            os.getenv("LLM_RECORDINGS", "recordings/gemini.db"),
+            mode=mode,
+            latency_scale=float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "0")),
+            on_miss=os.getenv("LLM_REPLAY_MISS", "error").lower(),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        rows = self._conn.execute(
+            "SELECT prompt_hash, model, response, latency, first_chunk, chunks FROM responses ORDER BY prompt_hash"
+        ).fetchall()
+        for key, model, response, latency, first_chunk, chunks in rows:
+            self._recordings[key] = Recording(model, zlib.decompress(response).decode("utf-8"), latency,
+                                              first_chunk, json.loads(chunks) if chunks else None)
+        self._keys = [row[0] for row in rows]
+        log.info("replaying recorded gemini responses", extra={"recordings": len(self._keys), "path": self.path})
+
+    def record(self, prompt: str, model: str, text: str, latency: float, first_chunk: float = None, chunks: list = None):
+        if self.mode != "record":
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (prompt_hash, model, response, latency, first_chunk, chunks, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (prompt_key(prompt), model, zlib.compress(text.encode("utf-8")), latency, first_chunk,
+                 json.dumps(chunks) if chunks else None, time.time()),
+            )
+            self.recorded += 1
+
+    def lookup(self, prompt: str) -> Recording:
+        key = prompt_key(prompt)
+        recording = self._recordings.get(key)
+        if recording is None:
+            self.misses += 1
+            if self.on_miss != "any" or not self._keys:
+                raise ReplayMissError(f"No recorded Gemini response for prompt {key[:12]}")
+            recording = self._recordings[self._keys[int(key, 16) % len(self._keys)]]
+        self.replayed += 1
+        return recording
+
+    async def replay(self, recording: Recording) -> str:
+        """Return a looked-up recording's response after its recorded latency"""
+        if self.latency_scale > 0:
+            await asyncio.sleep(recording.latency * self.latency_scale)
+        return recording.text
+
+    async def replay_stream(self, recording: Recording):
+        """Yield a looked-up recording's response in its recorded chunk sizes"""
+        sizes = recording.chunks or [len(recording.text)]
+        first_chunk = recording.first_chunk if recording.first_chunk is not None else recording.latency
+        pause = (recording.latency - first_chunk) / max(len(sizes) - 1, 1)
+        position = 0
+        for index, size in enumerate(sizes):
+            if self.latency_scale > 0:
+                await asyncio.sleep((first_chunk if index == 0 else pause) * self.latency_scale)
+            yield recording.text[position:position + size]
+            position += size
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "recordings": len(self._keys) if self.replaying else None,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
@@ -0,0 +1,185 @@
+"""
+Local, deterministic resume analysis for Career Compass
+
+Extracts skills from a resume and job description against a skill
+taxonomy and computes a fit score from skill coverage and TF-IDF
+keyword similarity. Runs in milliseconds with no network call, so it
+serves as the instant first result, the offline fallback and a cheap
+prefilter in front of Gemini.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from skill_index import load_or_build, normalize
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SKILLS_PATH = os.getenv("SKILLS_PATH", os.path.join(DATA_DIR, "skills.json"))
+# Optional prebuilt automaton, see `python skill_index.py build`
+SKILL_INDEX_PATH = os.getenv("SKILL_INDEX_PATH", os.path.join(DATA_DIR, "skills.index"))
+
+# Weight of skill coverage vs keyword similarity in the fit score
+SKILL_WEIGHT = 0.7
+KEYWORD_WEIGHT = 0.3
+# Cosine similarity at which keyword overlap counts as a perfect match
+KEYWORD_SATURATION = 0.5
+
+_TOKEN_PATTERN = re.compile(r"\.?[a-z0-9][a-z0-9+#.\-]*")
+_STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does
+doing for from had has have having he her his how i if in into is it its itself just me more most
+my no not of on or our ours out over own same she should so some such than that the their them
+then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours years year experience work working
+including etc ability strong knowledge skills skill team role job candidate requirements preferred
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens that keep skill punctuation such as c++, c# and node.js"""
+    return [token.rstrip(".-") for token in _TOKEN_PATTERN.findall(text.lower())]
+
+
+class SkillTaxonomy:
+    """Maps skill aliases to canonical skill names"""
+
+    def __init__(self, categories: dict, prebuilt_path: str = None, source_path: str = None):
+        self.categories = {}
+        self.aliases = {}
+        for category, skills in categories.items():
+            for canonical, aliases in skills.items():
+                self.categories[canonical] = category
+                # Aliases are exhaustive so ambiguous names ("Go", "R") only match their listed forms
+                for alias in aliases or [canonical]:
+                    self.aliases[normalize(alias).strip()] = canonical
+        self.index = load_or_build(self.aliases, prebuilt_path, source_path)
+
+    @classmethod
+    def load(cls, path: str = SKILLS_PATH, prebuilt_path: str = SKILL_INDEX_PATH) -> "SkillTaxonomy":
+        with open(path, encoding="utf-8") as f:
+            categories = json.load(f)
+        return cls(categories, prebuilt_path, source_path=path)
+
+    def extract(self, text: str) -> Counter:
+        """Count canonical skill mentions in one pass over the text"""
+        return self.index.count(text)
+
+
+_taxonomy = None
+
+
+def get_taxonomy() -> SkillTaxonomy:
+    """Return the process-wide skill taxonomy, loading it on first use"""
+    global _taxonomy
+    if _taxonomy is None:
+        _taxonomy = SkillTaxonomy.load()
+    return _taxonomy
+
+
+def _segments(text: str) -> list:
+    """Split a document into paragraph/line segments used as the IDF corpus"""
+    return [segment for segment in re.split(r"\n\s*\n|\n", text) if segment.strip()]
+
+
+def keyword_similarity(resume_text: str, job_description: str) -> float:
+    """TF-IDF cosine similarity between the resume and the job description.
+
+    IDF is computed over the lines of both documents, so boilerplate terms
+    that appear everywhere carry little weight.
+    """
+    segments = [[t for t in tokenize(s) if t not in _STOPWORDS] for s in _segments(resume_text) + _segments(job_description)]
+    resume_terms = Counter(t for t in tokenize(resume_text) if t not in _STOPWORDS)
+    jd_terms = Counter(t for t in tokenize(job_description) if t not in _STOPWORDS)
+    vocabulary = sorted(set(resume_terms) | set(jd_terms))
+    if not vocabulary or not resume_terms or not jd_terms:
+        return 0.0
+
+    position = {term: i for i, term in enumerate(vocabulary)}
+    document_frequency = np.zeros(len(vocabulary))
+    for segment in segments:
+        for term in set(segment):
+            document_frequency[position[term]] += 1
+    idf = np.log((1 + len(segments)) / (1 + document_frequency)) + 1
+
+    tf = np.zeros((2, len(vocabulary)))
+    for row, counts in enumerate((resume_terms, jd_terms)):
+        indices = [position[term] for term in counts]
+        tf[row, indices] = list(counts.values())
+    weights = np.log1p(tf) * idf
+    norms = np.linalg.norm(weights, axis=1)
+    if not norms.all():
+        return 0.0
+    return float(weights[0] @ weights[1] / (norms[0] * norms[1]))
+
+
+def skill_coverage(resume_skills: Counter, jd_skills: Counter) -> float:
+    """Fraction of the job's skills present in the resume, weighting frequently mentioned skills higher"""
+    if not jd_skills:
+        return 0.0
+    names = list(jd_skills)
+    weights = 1 + np.log(np.array([jd_skills[name] for name in names], dtype=float))
+    present = np.array([name in resume_skills for name in names], dtype=float)
+    return float(weights @ present / weights.sum())
+
+
+def _suggestions(missing: list, taxonomy: SkillTaxonomy) -> list:
+    suggestions = []
+    by_category = {}
+    for skill in missing:
+        by_category.setdefault(taxonomy.categories.get(skill, "Other"), []).append(skill)
+    for category, skills in by_category.items():
+        listed = ", ".join(skills[:4])
+        suggestions.append(f"Add evidence of {category.lower()} the role asks for: {listed}")
+    suggestions.append("Mirror the job description's wording for skills you already have")
+    suggestions.append("Quantify achievements with metrics (impact, scale, performance)")
+    return suggestions
+
+
+def analyze_locally(resume_text: str, job_description: str,
+                    resume_skills: Counter = None, jd_skills: Counter = None) -> dict:
+    """Score a resume against a job description without calling an LLM
+
+    Callers that already extracted skills (e.g. the job library) can pass
+    them in to skip a second scan.
+    """
+    taxonomy = get_taxonomy()
+    if resume_skills is None:
+        resume_skills = taxonomy.extract(resume_text)
+    if jd_skills is None:
+        jd_skills = taxonomy.extract(job_description)
+
+    matched = [skill for skill, _ in jd_skills.most_common() if skill in resume_skills]
+    missing = [skill for skill, _ in jd_skills.most_common() if skill not in resume_skills]
+
+    keyword_score = min(keyword_similarity(resume_text, job_description) / KEYWORD_SATURATION, 1.0)
+    if jd_skills:
+        coverage = skill_coverage(resume_skills, jd_skills)
+        score = SKILL_WEIGHT * coverage + KEYWORD_WEIGHT * keyword_score
+    else:
+        coverage = None
+        score = keyword_score
+    fit_score = int(round(100 * score))
+
+    if jd_skills:
+        feedback = (
+            f"The resume covers {len(matched)} of {len(jd_skills)} skills identified in the job description "
+            f"({math.floor(100 * coverage)}% weighted coverage) with a keyword similarity of "
+            f"{math.floor(100 * keyword_score)}%."
+        )
+    else:
+        feedback = f"No known skills were found in the job description; keyword similarity is {math.floor(100 * keyword_score)}%."
+    if missing:
+        feedback += f" Key gaps: {', '.join(missing[:5])}."
+
+    return {
+        "fit_score": fit_score,
+        "feedback": feedback,
+        "skills_match": {"matched": matched, "missing": missing},
+        "improvement_suggestions": _suggestions(missing, taxonomy),
+        "missing_skills": missing,
+        "source": "local",
+    }
@@ -0,0 +1,81 @@
+"""
+Structured, non-blocking logging for Career Compass
+
+Records from the career_compass loggers are put on a queue by a
+QueueHandler and written as JSON lines by a background QueueListener
+thread, so a slow stdout or log collector never stalls the event loop.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Attributes every LogRecord has; anything else was passed via extra= and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener = None
+_queue = None
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with extra= fields at the top level"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    """Send career_compass.* logs through a queue to a background JSON writer
+
+    LOG_LEVEL sets the level, LOG_FORMAT=text switches to plain lines and
+    LOG_ACCESS=false silences the per-request access log.
+    """
+    global _queue, _handler
+    if _listener is not None:
+        return
+    _handler = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    else:
+        _handler.setFormatter(JsonFormatter())
+    _queue = queue.SimpleQueue()
+    _start_listener()
+    if hasattr(os, "register_at_fork"):
+        # Threads do not survive fork(): preloaded workers start their own writer
+        os.register_at_fork(after_in_child=_start_listener)
+
+    logger = logging.getLogger("career_compass")
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    logger.addHandler(logging.handlers.QueueHandler(_queue))
+    logger.propagate = False
+    if os.getenv("LOG_ACCESS", "true").lower() not in ("1", "true", "yes"):
+        logging.getLogger("career_compass.access").setLevel(logging.WARNING)
+
+
+def _start_listener():
+    global _listener
+    if _queue is not None:
+        _listener = logging.handlers.QueueListener(_queue, _handler)
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
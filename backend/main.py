@@ -1,42 +1,139 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
-import PyPDF2
-import io
+import asyncio
 import json
-import re
+import logging
+import time
+import uuid
+from typing import List, Optional
+from admission import AdmissionController, AdmissionRejected, client_id, current_client
+from cache import PROMPT_VERSION, AnalysisCache, DocumentCache, analysis_cache_key
+from extractors import ExtractionError, extract_document, extractor_stats, resolve_kind
+from jd_library import JobLibrary
+from job_queue import JobQueue, JobWorkerPool, RetryableJobError
+from local_analyzer import analyze_locally, get_taxonomy
+from model_registry import ModelRegistry, is_quota_error
+from llm_client import LLMClient, LLMTimeoutError, cancel_on_disconnect
+from llm_recorder import ResponseRecorder
+from log_config import configure_logging, shutdown_logging
+from metrics import CACHE_LOOKUPS, ERRORS, FALLBACKS, Gauge, RequestMetricsMiddleware, render as render_metrics
+from pdf_extraction import shutdown_pool, warm_pool
+from prompt_builder import JD_PRIORITY, PROMPT_TOKEN_BUDGET, estimate_tokens, pack_document, pack_documents
+from request_timing import ServerTimingMiddleware, record_stage, stage
+from response_parser import IncrementalAnalysisParser, parse_analysis
+from section_analysis import SECTION_PROMPT_VERSION, DocumentVersions, compose_analysis, plan_sections
+from resume_profiles import PROFILE_VERSION, ProfileStore, describe as describe_profile, render_profile
+from singleflight import SingleFlight
+from uploads import RequestSizeLimitMiddleware, ingest_upload
+from warmup import WarmUp
 
 # Load environment variables
 load_dotenv()
+configure_logging()
+log = logging.getLogger("career_compass.api")
 
 app = FastAPI(title="Career Compass API", version="1.0.0")
 
+# Request latency histogram and structured access log (no per-request print)
+app.add_middleware(RequestMetricsMiddleware)
+
+# Server-Timing header per request; X-Profile / PROFILE_SAMPLE_RATE write profiles to PROFILE_DIR
+app.add_middleware(ServerTimingMiddleware)
+
 # Configure CORS
 origins = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
 
+# Reject oversized request bodies (UPLOAD_MAX_REQUEST_BYTES) before they are parsed
+app.add_middleware(RequestSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser frontend read the incremental-analysis and cache headers
+    expose_headers=["X-Document-Id", "X-Sections-Changed", "X-Sections-Reused", "X-Prompt-Tokens",
+                    "X-Analysis-Source", "X-Analysis-Model", "X-Cache"],
 )
 
-# Configure Google Gemini
+# Configure Google Gemini (the SDK is imported by the registry on first use)
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 if not gemini_api_key or gemini_api_key == "your_gemini_api_key_here":
     print("⚠️  WARNING: Please set your GEMINI_API_KEY in the .env file")
     print("   Get your key from: https://aistudio.google.com/app/apikey")
 else:
-    genai.configure(api_key=gemini_api_key)
     print("✅ Gemini API configured successfully")
 
+# Warm model clients in fallback order (GEMINI_MODEL / GEMINI_FALLBACK_MODELS)
+model_registry = ModelRegistry.from_env()
+GEMINI_MODEL = model_registry.primary
+
+def answering_model() -> str:
+    """Model the fallback chain asks first right now
+
+    Analyses are cached under the model that produced them, so lookups use
+    this one: the primary while it is healthy, a fallback while it cools down.
+    """
+    return model_registry.candidates()[0]
+
+# Result cache shared by /analyze/text and /analyze/files
+analysis_cache = AnalysisCache.from_env()
+
+# Per-section results and last-seen section hashes for /analyze/*/incremental
+section_cache = AnalysisCache.from_env(table="section_results")
+document_versions = DocumentVersions.from_env()
+SECTION_JD_TOKEN_BUDGET = int(os.getenv("SECTION_JD_TOKEN_BUDGET", "1500"))
+
+# Identical concurrent analyses share one Gemini call
+analysis_flights = SingleFlight()
+
+# Extracted text keyed by upload hash, shared across workers (EXTRACTION_CACHE_DB)
+document_cache = DocumentCache.from_env()
+
+# Non-blocking Gemini client (LLM_MAX_CONCURRENCY / LLM_TIMEOUT)
+llm_client = LLMClient(model_registry, recorder=ResponseRecorder.from_env())
+
+# Token buckets sized to the Gemini quota (GEMINI_RPM / GEMINI_TPM) with a fair wait queue
+admission = AdmissionController.from_env()
+
+# Serve the local skill-based analysis when Gemini is missing or failing
+LOCAL_FALLBACK = os.getenv("LOCAL_FALLBACK", "true").lower() in ("1", "true", "yes")
+
+# Distilled resume profiles referenced by /analyze/profile (PROFILES_DB)
+profile_store = ProfileStore.from_env()
+
+# Persistent job-description library for /match/top-k
+job_library = JobLibrary(os.getenv("JD_LIBRARY_DB", "library/postings.db"))
+MATCH_MAX_K = int(os.getenv("MATCH_MAX_K", "50"))
+MATCH_MAX_RERANK = int(os.getenv("MATCH_MAX_RERANK", "5"))
+
+# Persistent queue for /jobs, drained by JOBS_WORKERS background workers
+job_queue = JobQueue.from_env()
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "4"))
+JOBS_MAX_QUEUED = int(os.getenv("JOBS_MAX_QUEUED", "1000"))
+JOBS_MAX_WAIT = float(os.getenv("JOBS_MAX_WAIT", "25"))
+
+# On SIGTERM, running jobs and Gemini calls get this long to finish
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "30"))
+
+# Gauges read when /metrics is scraped
+Gauge("career_compass_llm_in_flight", "Gemini calls in flight", function=lambda: llm_client.in_flight)
+Gauge("career_compass_admission_queued", "Requests waiting for Gemini quota", function=lambda: admission.queued)
+Gauge("career_compass_jobs_queued", "Jobs waiting in the job queue", function=lambda: job_queue.depth())
+Gauge("career_compass_job_workers_busy", "Job workers running a job", function=lambda: job_workers.busy)
+
+# /analyze/batch limits
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "50"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
 # Pydantic models for request/response
 class AnalysisResponse(BaseModel):
     fit_score: int
@@ -46,10 +143,82 @@ class AnalysisResponse(BaseModel):
     improvement_suggestions: list
     missing_skills: list
 
+class IncrementalAnalysisResponse(AnalysisResponse):
+    document_id: str
+    sections_changed: list
+    sections_removed: list
+    sections: list
+
 class TextAnalysisRequest(BaseModel):
     resume_text: str
     job_description: str
 
+class IncrementalAnalysisRequest(TextAnalysisRequest):
+    document_id: Optional[str] = None
+
+class ProfileRequest(BaseModel):
+    resume_text: str
+
+class ProfileAnalysisRequest(BaseModel):
+    profile_id: str
+    job_description: str
+
+class JobPostingRequest(BaseModel):
+    title: str
+    text: str
+
+class TopKRequest(BaseModel):
+    resume_text: str
+    k: int = 5
+    rerank: int = 0
+
+@app.middleware("http")
+async def identify_client(request: Request, call_next):
+    # Admission control queues and limits Gemini calls per client
+    current_client.set(client_id(request))
+    return await call_next(request)
+
+def warm_models():
+    # Import the SDK and build the model clients once instead of on the first request
+    if not gemini_configured() or llm_client.replaying:
+        return
+    model_registry.warm()
+    print(f"✅ Gemini models ready: {', '.join(model_registry.model_names)}")
+    if model_registry.backend == "fake":
+        print("🧪 GEMINI_BACKEND=fake: answering with the local fake LLM, not Gemini")
+
+# Slow initialisation runs after the port is bound; /health/ready reports when it is done
+warm_up = WarmUp()
+warm_up.add("skill_index", get_taxonomy)
+warm_up.add("gemini_models", warm_models)
+warm_up.add("pdf_pool", warm_pool)
+
+@app.on_event("startup")
+def start_warm_up():
+    warm_up.start()
+
+@app.on_event("startup")
+def start_job_workers():
+    if JOBS_WORKERS > 0:
+        job_workers.start()
+
+@app.on_event("shutdown")
+async def drain_in_flight_work():
+    # The server has stopped accepting requests; finish what is running, and
+    # jobs still unfinished after SHUTDOWN_DRAIN_TIMEOUT go back to the queue
+    deadline = time.monotonic() + SHUTDOWN_DRAIN_TIMEOUT
+    await job_workers.stop(drain=SHUTDOWN_DRAIN_TIMEOUT)
+    left = await llm_client.drain(max(deadline - time.monotonic(), 0))
+    if left:
+        print(f"⚠️  Shutting down with {left} Gemini calls still in flight")
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await warm_up.stop()
+    shutdown_pool()
+    llm_client.shutdown()
+    shutdown_logging()
+
 @app.get("/")
 def read_root():
     return {
@@ -58,109 +227,129 @@ def read_root():
         "endpoints": {
             "analyze_files": "/analyze/files",
             "analyze_text": "/analyze/text",
-            "health": "/health"
+            "analyze_local": "/analyze/local",
+            "analyze_batch": "/analyze/batch",
+            "analyze_profile": "/analyze/profile",
+            "analyze_text_incremental": "/analyze/text/incremental",
+            "analyze_files_incremental": "/analyze/files/incremental",
+            "analyze_text_stream": "/analyze/text/stream",
+            "analyze_files_stream": "/analyze/files/stream",
+            "jobs": "/jobs",
+            "profiles": "/profiles",
+            "library": "/library/postings",
+            "match_top_k": "/match/top-k",
+            "models": "/models",
+            "metrics": "/metrics",
+            "health": "/health",
+            "liveness": "/health/live",
+            "readiness": "/health/ready"
         }
     }
 
+@app.get("/health/live")
+def liveness():
+    """The process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness(response: Response):
+    """200 once the startup warm-up has finished, 503 while it is running"""
+    if not warm_up.finished:
+        response.status_code = 503
+    return warm_up.stats()
+
 @app.get("/health")
 def health_check():
     gemini_status = "configured" if gemini_api_key and gemini_api_key != "your_gemini_api_key_here" else "not_configured"
     return {
         "status": "healthy",
-        "gemini_api": gemini_status
+        "ready": warm_up.finished,
+        "warmup": warm_up.stats(),
+        "gemini_api": gemini_status,
+        "analysis_cache": analysis_cache.stats(),
+        "section_cache": section_cache.stats(),
+        "coalescing": analysis_flights.stats(),
+        "extraction_cache": document_cache.stats(),
+        "profiles": profile_store.stats(),
+        "extractors": extractor_stats(),
+        "llm": llm_client.stats(),
+        "admission": admission.stats(),
+        "jobs": job_workers.stats()
     }
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF file"""
-    try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics for this worker process"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
-def decode_file_content(file_content: bytes, filename: str) -> str:
-    """Decode file content with multiple encoding attempts"""
-    encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']
-    
-    for encoding in encodings:
-        try:
-            return file_content.decode(encoding)
-        except UnicodeDecodeError:
-            continue
-    
-    # If all encodings fail, try with errors='ignore'
-    try:
-        return file_content.decode('utf-8', errors='ignore')
-    except:
-        raise HTTPException(status_code=400, detail=f"Unable to decode {filename}. Please ensure it's a valid text file or PDF.")
+@app.get("/models")
+def list_models():
+    """Fallback chain with per-model latency, error and cooldown stats"""
+    return model_registry.as_dict()
 
-def parse_gemini_response(response_text: str) -> dict:
-    """Parse Gemini response to extract structured data"""
-    try:
-        # Try to find JSON in the response
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-    except:
-        pass
-    
-    # Fallback: parse text response
-    lines = response_text.split('\n')
-    result = {
-        "fit_score": 70,
-        "feedback": response_text,
-        "skills_match": {"matched": [], "missing": []},
-        "improvement_suggestions": [],
-        "missing_skills": []
-    }
-    
-    # Extract fit score
-    for line in lines:
-        if "fit score" in line.lower() or "score" in line.lower():
-            numbers = re.findall(r'\d+', line)
-            if numbers:
-                result["fit_score"] = min(int(numbers[0]), 100)
-                break
-    
-    return result
+async def extract_upload_text(upload: UploadFile) -> str:
+    """Stream an upload in and return its text, reusing earlier extractions of the same bytes
 
-async def analyze_with_gemini(resume_text: str, job_description: str) -> dict:
-    """Analyze resume and job description using Gemini"""
-    if not gemini_api_key or gemini_api_key == "your_gemini_api_key_here":
-        raise HTTPException(
-            status_code=500, 
-            detail="Gemini API key not configured. Please set GEMINI_API_KEY in .env file"
-        )
-    
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        prompt = f"""
-Analyze the following resume against the job description and provide a detailed assessment.
+    The file type comes from the content's magic bytes, not the filename,
+    and selects the extractor (PDF, DOCX, HTML, Markdown, RTF or text).
+    """
+    with stage("upload_read"):
+        document = await ingest_upload(upload)
+    with document:
+        kind = resolve_kind(document)
+        if kind is None:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported file type for {document.filename}. "
+                       f"Please upload a PDF, DOCX, HTML, Markdown, RTF or text file."
+            )
+        text = document_cache.get(document.sha256, kind)
+        CACHE_LOOKUPS.labels("extraction", "miss" if text is None else "hit").inc()
+        if text is not None:
+            return text
+        try:
+            with stage("extraction"):
+                result = await extract_document(document, kind)
+        except ExtractionError as e:
+            ERRORS.labels("extraction", kind).inc()
+            raise HTTPException(status_code=400, detail=f"Error reading {document.filename}: {str(e)}")
+        log.info("document extracted", extra={
+            "file": document.filename, "extractor": result["extractor"], "chars": result["chars"],
+            "bytes": result["bytes"], "elapsed_ms": round(result["elapsed_ms"], 1),
+            "truncated": bool(result.get("truncated")),
+        })
+        document_cache.set(document.sha256, kind, result["text"])
+        return result["text"]
 
-RESUME:
-{resume_text}
+def parse_gemini_response(response_text: str, fallback: dict = None) -> dict:
+    """Parse Gemini response to extract structured data
 
-JOB DESCRIPTION:
-{job_description}
+    Malformed JSON is repaired locally and validated against the
+    AnalysisResponse fields; anything missing comes from the fallback
+    (local) analysis, so callers never see a KeyError.
+    """
+    with stage("response_parse"):
+        analysis = parse_analysis(response_text, fallback)
+    if analysis["parse"]["stage"] != "json":
+        log.info("gemini response repaired", extra={
+            "parse_stage": analysis["parse"]["stage"], "repaired_fields": analysis["parse"]["repaired_fields"],
+        })
+    return analysis
 
-Provide your analysis in the following JSON format:
-{{
+ANALYSIS_FORMAT = """Provide your analysis in the following JSON format:
+{
     "fit_score": <number between 0-100>,
     "feedback": "<detailed paragraph explaining the fit>",
-    "skills_match": {{
+    "skills_match": {
         "matched": ["skill1", "skill2"],
         "missing": ["missing_skill1", "missing_skill2"]
-    }},
+    },
     "improvement_suggestions": [
         "suggestion 1",
         "suggestion 2"
     ],
     "missing_skills": ["skill1", "skill2"]
-}}
+}
 
 Focus on:
 1. Technical skills alignment
@@ -169,62 +358,771 @@ Focus on:
 4. Soft skills
 5. Specific improvements needed
 """
-        
-        response = model.generate_content(prompt)
-        return parse_gemini_response(response.text)
+
+def build_analysis_prompt(resume_text: str, job_description: str) -> tuple:
+    """Build the Gemini prompt for a resume / job description analysis
+
+    Both documents are packed section by section into PROMPT_TOKEN_BUDGET.
+    Returns (prompt, estimated_prompt_tokens).
+    """
+    started = time.perf_counter()
+    packed = pack_documents(resume_text, job_description)
+    resume_text = packed["resume"]["text"]
+    job_description = packed["job_description"]["text"]
+    prompt = f"""
+Analyze the following resume against the job description and provide a detailed assessment.
+
+RESUME:
+{resume_text}
+
+JOB DESCRIPTION:
+{job_description}
+
+{ANALYSIS_FORMAT}"""
+    record_stage("prompt_build", time.perf_counter() - started)
+    return prompt, estimate_tokens(prompt)
+
+def build_profile_prompt(profile: dict, job_description: str) -> tuple:
+    """Build the Gemini prompt from a stored resume profile instead of the resume text
+
+    The job description gets whatever budget the compact profile leaves.
+    Returns (prompt, estimated_prompt_tokens).
+    """
+    started = time.perf_counter()
+    profile_text = render_profile(profile)
+    jd_budget = max(PROMPT_TOKEN_BUDGET - estimate_tokens(profile_text), 500)
+    job_description = pack_document(job_description, jd_budget, JD_PRIORITY)["text"]
+    prompt = f"""
+Analyze the following candidate profile against the job description and provide a detailed assessment.
+The profile was distilled from the candidate's resume: skills by category, roles with years and
+quantified highlights, projects and education.
+
+CANDIDATE PROFILE:
+{profile_text}
+
+JOB DESCRIPTION:
+{job_description}
+
+{ANALYSIS_FORMAT}"""
+    record_stage("prompt_build", time.perf_counter() - started)
+    return prompt, estimate_tokens(prompt)
+
+def build_section_prompt(section: dict, job_description: str) -> tuple:
+    """Build the Gemini prompt for one resume section against the job description
+
+    The job description is packed into SECTION_JD_TOKEN_BUDGET, keeping
+    requirements and skills first. Returns (prompt, estimated_prompt_tokens).
+    """
+    started = time.perf_counter()
+    job_description = pack_document(job_description, SECTION_JD_TOKEN_BUDGET, JD_PRIORITY)["text"]
+    prompt = f"""
+Analyze one section of a resume against the job description. Judge only what this section
+shows: fit_score is how strongly this section supports the candidate's fit, feedback is one or
+two sentences about this section, skills_match lists the job's skills this section does and
+does not evidence, and improvement_suggestions are concrete edits to this section.
+
+RESUME SECTION ({section["name"]}):
+{section["text"]}
+
+JOB DESCRIPTION:
+{job_description}
+
+{ANALYSIS_FORMAT}"""
+    record_stage("prompt_build", time.perf_counter() - started)
+    return prompt, estimate_tokens(prompt)
+
+def gemini_configured() -> bool:
+    if model_registry.backend == "fake" or llm_client.replaying:
+        return True
+    return bool(gemini_api_key) and gemini_api_key != "your_gemini_api_key_here"
+
+def quota_exceeded(detail: str, retry_after: int) -> HTTPException:
+    return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+
+async def admit_gemini_call(prompt_tokens: int):
+    """Wait for Gemini quota, failing fast with 429 when the queue is saturated"""
+    try:
+        record_stage("admission_wait", await admission.acquire(prompt_tokens))
+    except AdmissionRejected as e:
+        ERRORS.labels("admission", e.reason).inc()
+        log.warning("gemini call rejected", extra={"client": current_client.get(), "reason": e.reason, "error": str(e)})
+        raise quota_exceeded(str(e), e.retry_after)
+
+def require_gemini_api_key():
+    """Fail fast when no Gemini API key is configured"""
+    if not gemini_configured():
+        raise HTTPException(
+            status_code=500, 
+            detail="Gemini API key not configured. Please set GEMINI_API_KEY in .env file"
+        )
+
+def gemini_error_kind(error: Exception) -> str:
+    if isinstance(error, LLMTimeoutError):
+        return "timeout"
+    return "quota" if is_quota_error(error) else "error"
+
+def build_prompt(resume_text: str, job_description: str, profile: dict = None) -> tuple:
+    """The profile prompt when a stored profile is given, otherwise the full-resume prompt"""
+    if profile is not None:
+        return build_profile_prompt(profile, job_description)
+    return build_analysis_prompt(resume_text, job_description)
+
+async def analyze_with_gemini(resume_text: str, job_description: str, profile: dict = None) -> dict:
+    """Analyze resume and job description using Gemini
+
+    With a stored profile, Gemini sees the compact profile instead of the resume text.
+    """
+    # The local analysis backs up the parser and answers when Gemini is unavailable
+    with stage("local_analysis"):
+        local_analysis = analyze_locally(resume_text, job_description)
+    if not gemini_configured() and LOCAL_FALLBACK:
+        FALLBACKS.labels("not_configured").inc()
+        return local_analysis
+    require_gemini_api_key()
+    
+    prompt, prompt_tokens = build_prompt(resume_text, job_description, profile)
+    try:
+        await admit_gemini_call(prompt_tokens)
+    except HTTPException as e:
+        return rejection_fallback(e, local_analysis)
+    try:
+        with stage("gemini_call"):
+            response_text = await llm_client.generate(prompt)
+        analysis = parse_gemini_response(response_text, fallback=local_analysis)
+        analysis["prompt_tokens"] = prompt_tokens
+        analysis["model"] = response_text.model
+        return analysis
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gemini API error: {str(e)}")
+        return gemini_failure(e, local_analysis)
+
+def rejection_fallback(error: HTTPException, local_analysis: dict) -> dict:
+    """Local analysis for a call admission control rejected, as the stream endpoints serve
+
+    Without LOCAL_FALLBACK the 429 goes to the client. The fallback keeps the
+    rejection's Retry-After so queued jobs know when to try Gemini again.
+    """
+    if not LOCAL_FALLBACK or error.status_code != 429:
+        raise error
+    FALLBACKS.labels("rejected").inc()
+    retry_after = (error.headers or {}).get("Retry-After")
+    return {**local_analysis, "retry_after": float(retry_after) if retry_after else None}
+
+def gemini_failure(error: Exception, local_analysis: dict) -> dict:
+    """Record a failed Gemini call; return the local analysis or raise the matching HTTP error"""
+    ERRORS.labels("gemini_call", gemini_error_kind(error)).inc()
+    if is_quota_error(error):
+        admission.backoff()
+    if LOCAL_FALLBACK:
+        FALLBACKS.labels("gemini_error").inc()
+        log.warning("gemini unavailable, serving local analysis", extra={"error": str(error)})
+        return local_analysis
+    if isinstance(error, LLMTimeoutError):
+        raise HTTPException(status_code=504, detail=str(error))
+    if is_quota_error(error):
+        raise quota_exceeded(f"Gemini quota exhausted: {str(error)}", int(admission.quota_backoff))
+    raise HTTPException(status_code=500, detail=f"Gemini API error: {str(error)}")
+
+def analysis_key(resume_text: str, job_description: str, model: str, profile: dict = None) -> str:
+    """Result cache key; profile-based analyses are cached separately from full-resume ones"""
+    prompt_version = f"{PROMPT_VERSION}-{PROFILE_VERSION}" if profile is not None else PROMPT_VERSION
+    return analysis_cache_key(resume_text, job_description, model, prompt_version)
+
+def store_analysis(resume_text: str, job_description: str, analysis: dict, profile: dict = None):
+    """Cache an analysis under the model that answered it
+
+    Local fallbacks are not cached so Gemini is retried once it recovers.
+    """
+    if analysis.get("source") != "local":
+        analysis_cache.set(analysis_key(resume_text, job_description, analysis["model"], profile), analysis)
+
+async def cached_analysis(resume_text: str, job_description: str, response: Response = None,
+                          profile: dict = None) -> dict:
+    """Serve an analysis from the result cache, calling Gemini only on a miss
+
+    Concurrent misses for the same key, streamed or not, are coalesced into
+    one Gemini call. Each analysis is stored under the model that answered it.
+    """
+    key = analysis_key(resume_text, job_description, answering_model(), profile)
+    analysis, tier = analysis_cache.get(key)
+    if analysis is None:
+        async def analyze_and_store():
+            result = await analyze_with_gemini(resume_text, job_description, profile)
+            store_analysis(resume_text, job_description, result, profile)
+            return result
+        
+        analysis, shared = await analysis_flights.do(key, analyze_and_store)
+        CACHE_LOOKUPS.labels("analysis", "coalesced" if shared else "miss").inc()
+        if response is not None:
+            response.headers["X-Cache"] = "COALESCED" if shared else "MISS"
+    else:
+        CACHE_LOOKUPS.labels("analysis", "hit").inc()
+        if response is not None:
+            response.headers["X-Cache"] = "HIT"
+            response.headers["X-Cache-Tier"] = tier
+    if response is not None:
+        response.headers["X-Analysis-Source"] = analysis.get("source", "gemini")
+        if "model" in analysis:
+            response.headers["X-Analysis-Model"] = analysis["model"]
+        if "prompt_tokens" in analysis:
+            response.headers["X-Prompt-Tokens"] = str(analysis["prompt_tokens"])
+    return analysis
+
+async def analyze_section(section: dict, job_description: str) -> tuple:
+    """Analysis of one resume section from the section cache, calling Gemini only on a miss
+
+    Returns (analysis, cached). Failures propagate to the caller.
+    """
+    section_text = f"{section['name']}\n{section['text']}"
+    key = analysis_cache_key(section_text, job_description, answering_model(), SECTION_PROMPT_VERSION)
+    analysis, _ = section_cache.get(key)
+    if analysis is not None:
+        CACHE_LOOKUPS.labels("section", "hit").inc()
+        return analysis, True
+
+    async def analyze_and_store():
+        prompt, prompt_tokens = build_section_prompt(section, job_description)
+        await admit_gemini_call(prompt_tokens)
+        with stage("gemini_call"):
+            response_text = await llm_client.generate(prompt)
+        result = parse_gemini_response(response_text, fallback=analyze_locally(section["text"], job_description))
+        result["prompt_tokens"] = prompt_tokens
+        result["model"] = response_text.model
+        # A reply that was not JSON is mostly the local fallback; retry Gemini next time instead of caching it
+        if result["parse"]["stage"] == "prose":
+            result["source"] = "local"
+        if result.get("source") != "local":
+            section_cache.set(analysis_cache_key(section_text, job_description, result["model"], SECTION_PROMPT_VERSION), result)
+        return result
+
+    analysis, shared = await analysis_flights.do(key, analyze_and_store)
+    CACHE_LOOKUPS.labels("section", "coalesced" if shared else "miss").inc()
+    return analysis, False
+
+async def incremental_analysis(resume_text: str, job_description: str, document_id: str, response: Response) -> dict:
+    """Analyze a resume section by section, re-evaluating only sections not seen before
+
+    Unchanged sections come from the section cache; the overall analysis
+    is recomposed from the section results on every call. The version
+    becomes the document's previous version only if its analysis succeeded.
+    """
+    sections = plan_sections(resume_text)
+    diff = document_versions.diff(document_id, sections)
+    response.headers["X-Document-Id"] = document_id
+    response.headers["X-Sections-Changed"] = ",".join(diff["changed"]) or "none"
+    
+    if not gemini_configured() and LOCAL_FALLBACK:
+        FALLBACKS.labels("not_configured").inc()
+        analysis = analyze_locally(resume_text, job_description)
+        document_versions.store(document_id, sections)
+    else:
+        require_gemini_api_key()
+        try:
+            results = await asyncio.gather(*(analyze_section(section, job_description) for section in sections))
+            analysis = compose_analysis(sections, results)
+            document_versions.store(document_id, sections)
+        except HTTPException as e:
+            with stage("local_analysis"):
+                analysis = rejection_fallback(e, analyze_locally(resume_text, job_description))
+        except Exception as e:
+            with stage("local_analysis"):
+                analysis = gemini_failure(e, analyze_locally(resume_text, job_description))
+        else:
+            reused = sum(cached for _, cached in results)
+            response.headers["X-Sections-Reused"] = f"{reused}/{len(results)}"
+            response.headers["X-Prompt-Tokens"] = str(sum(
+                result.get("prompt_tokens", 0) for result, cached in results if not cached
+            ))
+    response.headers["X-Analysis-Source"] = analysis.get("source", "gemini")
+    return {
+        **analysis,
+        "document_id": document_id,
+        "sections_changed": diff["changed"],
+        "sections_removed": diff["removed"],
+    }
+
+def build_incremental_response(analysis: dict) -> IncrementalAnalysisResponse:
+    """AnalysisResponse plus the document id to send back and the per-section breakdown"""
+    return IncrementalAnalysisResponse(
+        **build_analysis_response(analysis).model_dump(),
+        document_id=analysis["document_id"],
+        sections_changed=analysis["sections_changed"],
+        sections_removed=analysis["sections_removed"],
+        sections=analysis.get("sections", [])
+    )
+
+def build_analysis_response(analysis: dict) -> AnalysisResponse:
+    """Convert a parsed Gemini analysis into the API response model"""
+    return AnalysisResponse(
+        fit_score=analysis["fit_score"],
+        percentage=f"{analysis['fit_score']}%",
+        feedback=analysis["feedback"],
+        skills_match=analysis["skills_match"],
+        improvement_suggestions=analysis["improvement_suggestions"],
+        missing_skills=analysis["missing_skills"]
+    )
 
 @app.post("/analyze/files", response_model=AnalysisResponse)
-async def analyze_resume_files(resume: UploadFile = File(...), job_description: UploadFile = File(...)):
+async def analyze_resume_files(request: Request, response: Response, resume: UploadFile = File(...), job_description: UploadFile = File(...)):
     """Analyze resume and job description from uploaded files"""
     
     try:
-        # Read resume content
-        resume_content = await resume.read()
-        if resume.filename.endswith('.pdf'):
-            resume_text = extract_text_from_pdf(resume_content)
-        else:
-            resume_text = decode_file_content(resume_content, resume.filename)
-        
-        # Read job description content
-        jd_content = await job_description.read()
-        if job_description.filename.endswith('.pdf'):
-            jd_text = extract_text_from_pdf(jd_content)
-        else:
-            jd_text = decode_file_content(jd_content, job_description.filename)
+        # Read resume and job description content
+        resume_text = await extract_upload_text(resume)
+        jd_text = await extract_upload_text(job_description)
         
         # Analyze with Gemini
-        analysis = await analyze_with_gemini(resume_text, jd_text)
+        analysis = await cancel_on_disconnect(request, cached_analysis(resume_text, jd_text, response))
         
-        return AnalysisResponse(
-            fit_score=analysis["fit_score"],
-            percentage=f"{analysis['fit_score']}%",
-            feedback=analysis["feedback"],
-            skills_match=analysis["skills_match"],
-            improvement_suggestions=analysis["improvement_suggestions"],
-            missing_skills=analysis["missing_skills"]
-        )
+        return build_analysis_response(analysis)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@app.post("/analyze/local", response_model=AnalysisResponse)
+async def analyze_resume_local(payload: TextAnalysisRequest, response: Response):
+    """Instant skill-based analysis without calling Gemini"""
+    response.headers["X-Analysis-Source"] = "local"
+    return build_analysis_response(analyze_locally(payload.resume_text, payload.job_description))
+
 @app.post("/analyze/text", response_model=AnalysisResponse)
-async def analyze_resume_text(request: TextAnalysisRequest):
+async def analyze_resume_text(payload: TextAnalysisRequest, request: Request, response: Response):
     """Analyze resume and job description from text input"""
     
     try:
-        analysis = await analyze_with_gemini(request.resume_text, request.job_description)
-        
-        return AnalysisResponse(
-            fit_score=analysis["fit_score"],
-            percentage=f"{analysis['fit_score']}%",
-            feedback=analysis["feedback"],
-            skills_match=analysis["skills_match"],
-            improvement_suggestions=analysis["improvement_suggestions"],
-            missing_skills=analysis["missing_skills"]
+        analysis = await cancel_on_disconnect(
+            request, cached_analysis(payload.resume_text, payload.job_description, response)
         )
         
+        return build_analysis_response(analysis)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+def get_profile(profile_id: str) -> dict:
+    entry = profile_store.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Profile not found; create it with POST /profiles")
+    return entry
+
+@app.post("/profiles")
+def create_profile(payload: ProfileRequest):
+    """Distill a resume into a stored profile that later analyses reference by id"""
+    if not payload.resume_text.strip():
+        raise HTTPException(status_code=400, detail="Resume text is empty")
+    profile_id, entry, created = profile_store.create(payload.resume_text)
+    return {**describe_profile(profile_id, entry), "created": created}
+
+@app.post("/profiles/files")
+async def create_profile_file(resume: UploadFile = File(...)):
+    """Distill an uploaded resume into a stored profile"""
+    resume_text = await extract_upload_text(resume)
+    if not resume_text.strip():
+        raise HTTPException(status_code=400, detail=f"No text found in {resume.filename}")
+    profile_id, entry, created = profile_store.create(resume_text)
+    return {**describe_profile(profile_id, entry), "created": created}
+
+@app.get("/profiles/{profile_id}")
+def read_profile(profile_id: str):
+    return describe_profile(profile_id, get_profile(profile_id))
+
+@app.delete("/profiles/{profile_id}")
+def delete_profile(profile_id: str):
+    if not profile_store.delete(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {"deleted": profile_id}
+
+@app.post("/analyze/profile", response_model=AnalysisResponse)
+async def analyze_profile(payload: ProfileAnalysisRequest, request: Request, response: Response):
+    """Analyze a stored resume profile against a job description"""
+    entry = get_profile(payload.profile_id)
+    try:
+        analysis = await cancel_on_disconnect(request, cached_analysis(
+            entry["resume_text"], payload.job_description, response, profile=entry["profile"]
+        ))
+        return build_analysis_response(analysis)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@app.post("/analyze/profile/files", response_model=AnalysisResponse)
+async def analyze_profile_file(request: Request, response: Response, profile_id: str = Form(...),
+                               job_description: UploadFile = File(...)):
+    """Analyze a stored resume profile against an uploaded job description"""
+    entry = get_profile(profile_id)
+    try:
+        jd_text = await extract_upload_text(job_description)
+        analysis = await cancel_on_disconnect(request, cached_analysis(
+            entry["resume_text"], jd_text, response, profile=entry["profile"]
+        ))
+        return build_analysis_response(analysis)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@app.post("/analyze/text/incremental", response_model=IncrementalAnalysisResponse)
+async def analyze_resume_text_incremental(payload: IncrementalAnalysisRequest, request: Request, response: Response):
+    """Re-analyze an edited resume, sending only changed sections to Gemini
+
+    Pass back the document_id of the previous response to diff against that version.
+    """
+    try:
+        analysis = await cancel_on_disconnect(request, incremental_analysis(
+            payload.resume_text, payload.job_description, payload.document_id or uuid.uuid4().hex, response
+        ))
+        return build_incremental_response(analysis)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@app.post("/analyze/files/incremental", response_model=IncrementalAnalysisResponse)
+async def analyze_resume_files_incremental(request: Request, response: Response, resume: UploadFile = File(...),
+                                           job_description: UploadFile = File(...),
+                                           document_id: Optional[str] = Form(None)):
+    """Re-analyze an edited resume upload, sending only changed sections to Gemini"""
+    try:
+        resume_text = await extract_upload_text(resume)
+        jd_text = await extract_upload_text(job_description)
+        analysis = await cancel_on_disconnect(request, incremental_analysis(
+            resume_text, jd_text, document_id or uuid.uuid4().hex, response
+        ))
+        return build_incremental_response(analysis)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+async def stream_batch_results(resume_text: str, jobs: list):
+    """Yield one NDJSON line per job description as soon as its analysis completes"""
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def run(index: int, name: str, jd_text: str):
+        async with semaphore:
+            try:
+                return index, name, await cached_analysis(resume_text, jd_text), None
+            except HTTPException as e:
+                return index, name, None, e.detail
+            except Exception as e:
+                return index, name, None, str(e)
+
+    tasks = [asyncio.ensure_future(run(index, name, jd_text)) for index, (name, jd_text) in enumerate(jobs)]
+    ranking = []
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            index, name, analysis, error = await next_result
+            if error is not None:
+                yield json.dumps({"type": "error", "index": index, "job_description": name, "detail": error}) + "\n"
+                continue
+            result = build_analysis_response(analysis)
+            ranking.append({"index": index, "job_description": name, "fit_score": result.fit_score})
+            yield json.dumps({
+                "type": "result",
+                "index": index,
+                "job_description": name,
+                "analysis": result.model_dump()
+            }) + "\n"
+
+        ranking.sort(key=lambda item: item["fit_score"], reverse=True)
+        yield json.dumps({
+            "type": "summary",
+            "total": len(jobs),
+            "completed": len(ranking),
+            "failed": len(jobs) - len(ranking),
+            "ranking": ranking
+        }) + "\n"
+    finally:
+        # Client went away or the stream finished: drop any outstanding Gemini calls
+        for task in tasks:
+            task.cancel()
+
+@app.post("/analyze/batch")
+async def analyze_batch(
+    resume: UploadFile = File(...),
+    job_descriptions: Optional[List[UploadFile]] = File(None),
+    job_description_texts: Optional[List[str]] = Form(None)
+):
+    """Analyze one resume against many job descriptions, streaming NDJSON results"""
+    
+    try:
+        # Extract the resume once and every job description in parallel
+        resume_text = await extract_upload_text(resume)
+        job_descriptions = job_descriptions or []
+        jd_texts = await asyncio.gather(*(extract_upload_text(jd) for jd in job_descriptions))
+        jobs = [(jd.filename, text) for jd, text in zip(job_descriptions, jd_texts)]
+        jobs += [(f"text_{i + 1}", text) for i, text in enumerate(job_description_texts or [])]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+    
+    if not jobs:
+        raise HTTPException(status_code=400, detail="Provide at least one job description")
+    if len(jobs) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {BATCH_MAX_JOBS} job descriptions")
+    
+    return StreamingResponse(stream_batch_results(resume_text, jobs), media_type="application/x-ndjson")
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def replayed_events(analysis: dict) -> list:
+    """The structured field events a live stream would have produced for an analysis"""
+    events = [
+        sse_event(field, {"value": analysis[field]})
+        for field in IncrementalAnalysisParser.SCALAR_FIELDS if field in analysis
+    ]
+    events.extend(sse_event("suggestion", {"value": suggestion}) for suggestion in analysis.get("improvement_suggestions", []))
+    return events
+
+async def stream_analysis_events(resume_text: str, job_description: str, profile: dict = None):
+    """Stream Gemini output and structured fields as Server-Sent Events
+
+    A miss goes through the same single-flight as cached_analysis: the
+    stream that starts the Gemini call relays its chunks as they arrive,
+    while a stream joining a call already in flight gets the structured
+    fields once it finishes.
+    """
+    key = analysis_key(resume_text, job_description, answering_model(), profile)
+    analysis, tier = analysis_cache.get(key)
+    if analysis is not None:
+        CACHE_LOOKUPS.labels("analysis", "hit").inc()
+        yield sse_event("cache", {"hit": True, "tier": tier})
+        for event in replayed_events(analysis):
+            yield event
+    else:
+        # Instant first result while Gemini works
+        local_analysis = analyze_locally(resume_text, job_description)
+        yield sse_event("local", build_analysis_response(local_analysis).model_dump())
+        if not gemini_configured():
+            FALLBACKS.labels("not_configured").inc()
+            yield sse_event("result", build_analysis_response(local_analysis).model_dump())
+            return
+        events = asyncio.Queue()
+
+        async def stream_and_store():
+            try:
+                parser = IncrementalAnalysisParser()
+                chunks = []
+                prompt, prompt_tokens = build_prompt(resume_text, job_description, profile)
+                events.put_nowait(sse_event("prompt", {"tokens": prompt_tokens}))
+                await admit_gemini_call(prompt_tokens)
+                started = time.perf_counter()
+                async for chunk in llm_client.stream(prompt):
+                    chunks.append(chunk)
+                    events.put_nowait(sse_event("chunk", {"text": chunk}))
+                    for event, value in parser.feed(chunk):
+                        events.put_nowait(sse_event(event, {"value": value}))
+                record_stage("gemini_call", time.perf_counter() - started)
+                result = parse_gemini_response("".join(chunks), fallback=local_analysis)
+                result["prompt_tokens"] = prompt_tokens
+                result["model"] = chunks[-1].model if chunks else answering_model()
+                store_analysis(resume_text, job_description, result, profile)
+                return result
+            finally:
+                events.put_nowait(None)
+
+        flight = asyncio.ensure_future(analysis_flights.do(key, stream_and_store))
+        try:
+            # Relay events until our call ends, or until a call we joined returns its result
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                await asyncio.wait({getter, flight}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                event = getter.result()
+                if event is None:
+                    break
+                yield event
+            while not events.empty():
+                event = events.get_nowait()
+                if event is not None:
+                    yield event
+            analysis, shared = await flight
+            CACHE_LOOKUPS.labels("analysis", "coalesced" if shared else "miss").inc()
+            if shared:
+                for event in replayed_events(analysis):
+                    yield event
+        except HTTPException as e:
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail, "retry_after": (e.headers or {}).get("Retry-After")})
+            if not LOCAL_FALLBACK:
+                return
+            FALLBACKS.labels("rejected").inc()
+            analysis = local_analysis
+        except Exception as e:
+            ERRORS.labels("gemini_call", gemini_error_kind(e)).inc()
+            if is_quota_error(e):
+                admission.backoff()
+            status_code = 504 if isinstance(e, LLMTimeoutError) else 500
+            detail = str(e) if isinstance(e, LLMTimeoutError) else f"Gemini API error: {str(e)}"
+            yield sse_event("error", {"status_code": status_code, "detail": detail})
+            if not LOCAL_FALLBACK:
+                return
+            FALLBACKS.labels("gemini_error").inc()
+            analysis = local_analysis
+        finally:
+            # A client that goes away stops waiting; the shared call is cancelled once nobody waits
+            flight.cancel()
+    
+    try:
+        result = build_analysis_response(analysis)
+    except Exception as e:
+        yield sse_event("error", {"status_code": 500, "detail": f"Analysis failed: {str(e)}"})
+        return
+    yield sse_event("result", result.model_dump())
+
+def event_stream_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/analyze/text/stream")
+async def analyze_resume_text_stream(payload: TextAnalysisRequest):
+    """Analyze text input, streaming partial results as Server-Sent Events"""
+    if not LOCAL_FALLBACK:
+        require_gemini_api_key()
+    return event_stream_response(stream_analysis_events(payload.resume_text, payload.job_description))
+
+@app.post("/analyze/files/stream")
+async def analyze_resume_files_stream(resume: UploadFile = File(...), job_description: UploadFile = File(...)):
+    """Analyze uploaded files, streaming partial results as Server-Sent Events"""
+    if not LOCAL_FALLBACK:
+        require_gemini_api_key()
+    try:
+        resume_text = await extract_upload_text(resume)
+        jd_text = await extract_upload_text(job_description)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    return event_stream_response(stream_analysis_events(resume_text, jd_text))
+
+async def run_analysis_job(payload: dict, attempt: int) -> dict:
+    """Job handler: the same cached, coalesced analysis as /analyze/*
+
+    Nobody is waiting on a queued job, so a local fallback is not accepted
+    while attempts remain: Gemini is retried with backoff instead, and the
+    local analysis is only stored if the last attempt falls back as well.
+    """
+    current_client.set(payload.get("client", "anonymous"))
+    try:
+        analysis = await cached_analysis(payload["resume_text"], payload["job_description"])
+    except HTTPException as e:
+        if e.status_code == 429 or e.status_code >= 500:
+            retry_after = (e.headers or {}).get("Retry-After")
+            raise RetryableJobError(e.detail, float(retry_after) if retry_after else None)
+        raise
+    if analysis.get("source") == "local" and gemini_configured() and attempt < job_queue.max_attempts:
+        raise RetryableJobError("Gemini unavailable, local analysis held back for a retry", analysis.get("retry_after"))
+    result = build_analysis_response(analysis).model_dump()
+    result["source"] = analysis.get("source", "gemini")
+    return result
+
+job_workers = JobWorkerPool(job_queue, {"analysis": run_analysis_job}, workers=JOBS_WORKERS)
+
+def enqueue_analysis_job(resume_text: str, job_description: str, response: Response) -> dict:
+    """Queue an analysis and point the client at its status URL"""
+    if job_queue.depth() >= JOBS_MAX_QUEUED:
+        raise HTTPException(status_code=429, detail="Job queue is full", headers={"Retry-After": "30"})
+    job_id = job_queue.submit("analysis", {
+        "resume_text": resume_text,
+        "job_description": job_description,
+        "client": current_client.get()
+    })
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+
+@app.post("/jobs", status_code=202)
+async def submit_job_files(response: Response, resume: UploadFile = File(...), job_description: UploadFile = File(...)):
+    """Queue an analysis of uploaded files and return its job id immediately"""
+    try:
+        resume_text = await extract_upload_text(resume)
+        jd_text = await extract_upload_text(job_description)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    return enqueue_analysis_job(resume_text, jd_text, response)
+
+@app.post("/jobs/text", status_code=202)
+def submit_job_text(payload: TextAnalysisRequest, response: Response):
+    """Queue an analysis of text input and return its job id immediately"""
+    return enqueue_analysis_job(payload.resume_text, payload.job_description, response)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Job status and, once done, its result; wait=N long-polls up to N seconds"""
+    if not 0 <= wait <= JOBS_MAX_WAIT:
+        raise HTTPException(status_code=400, detail=f"wait must be between 0 and {JOBS_MAX_WAIT:.0f} seconds")
+    job = await job_queue.wait(job_id, wait) if wait else job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/library/postings")
+def add_posting(posting: JobPostingRequest):
+    """Add a job description to the library"""
+    if not posting.text.strip():
+        raise HTTPException(status_code=400, detail="Job description text is empty")
+    return job_library.add(posting.title, posting.text)
+
+@app.post("/library/postings/files")
+async def add_posting_files(files: List[UploadFile] = File(...)):
+    """Add uploaded job description files (PDF or TXT) to the library"""
+    added = []
+    for upload in files:
+        text = await extract_upload_text(upload)
+        if text.strip():
+            added.append(job_library.add(upload.filename, text))
+    return {"added": added}
+
+@app.get("/library/postings")
+def list_postings():
+    return {"count": len(job_library), "postings": job_library.list()}
+
+@app.delete("/library/postings/{posting_id}")
+def delete_posting(posting_id: int):
+    if not job_library.remove(posting_id):
+        raise HTTPException(status_code=404, detail="Posting not found")
+    return {"deleted": posting_id}
+
+@app.post("/match/top-k")
+async def match_top_k(payload: TopKRequest, request: Request):
+    """Rank library postings for a resume locally, optionally reranking the best with Gemini"""
+    if not 1 <= payload.k <= MATCH_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {MATCH_MAX_K}")
+    if not 0 <= payload.rerank <= MATCH_MAX_RERANK:
+        raise HTTPException(status_code=400, detail=f"rerank must be between 0 and {MATCH_MAX_RERANK}")
+    
+    matches = job_library.top_k(payload.resume_text, payload.k)
+    
+    # Gemini only sees the few postings the local scorer liked best
+    reranked, texts = [], []
+    for match in matches[:payload.rerank]:
+        posting = job_library.get(match["id"])
+        # Skip postings deleted since they were ranked
+        if posting is not None:
+            reranked.append(match)
+            texts.append(posting["text"])
+    if reranked:
+        analyses = await cancel_on_disconnect(request, asyncio.gather(*(
+            cached_analysis(payload.resume_text, text) for text in texts
+        )))
+        for match, analysis in zip(reranked, analyses):
+            match["local_fit_score"] = match["fit_score"]
+            match["fit_score"] = analysis["fit_score"]
+            match["analysis"] = build_analysis_response(analysis).model_dump()
+        reranked.sort(key=lambda item: item["fit_score"], reverse=True)
+    matches = reranked + matches[payload.rerank:]
+    
+    return {"total_postings": len(job_library), "matches": matches}
@@ -0,0 +1,170 @@
+"""
+Warm Gemini model registry with an ordered fallback chain
+
+Model clients are built once at startup from settings and reused for
+every request. The SDK keeps one process-wide transport per client type,
+so reusing the model objects also reuses the underlying connections.
+Models that keep failing, hit quota limits or become too slow are put in
+a cooldown and requests move on to the next model in the chain.
+The SDK itself is imported on first use (or by the startup warm-up),
+because importing it takes about a second.
+"""
+import logging
+import os
+import time
+from collections import deque
+
+QUOTA_ERRORS = ("ResourceExhausted", "TooManyRequests")
+
+log = logging.getLogger("career_compass.llm")
+
+_sdk = None
+
+
+def load_sdk(api_key: str = None):
+    """Import and configure google.generativeai once"""
+    global _sdk
+    if _sdk is None:
+        import google.generativeai as genai
+        if api_key:
+            genai.configure(api_key=api_key)
+        _sdk = genai
+    return _sdk
+
+
+def is_quota_error(error: Exception) -> bool:
+    return type(error).__name__ in QUOTA_ERRORS or getattr(error, "code", None) == 429
+
+
+class ModelStats:
+    """Rolling latency/error statistics for one model"""
+
+    def __init__(self, window: int = 50):
+        self.calls = 0
+        self.errors = 0
+        self.quota_errors = 0
+        self.consecutive_errors = 0
+        self.latencies = deque(maxlen=window)
+        self.last_error = None
+        self.cooldown_until = 0.0
+
+    def latency_percentile(self, percentile: float):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    def as_dict(self) -> dict:
+        p50 = self.latency_percentile(0.5)
+        p95 = self.latency_percentile(0.95)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "quota_errors": self.quota_errors,
+            "consecutive_errors": self.consecutive_errors,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "last_error": self.last_error,
+            "cooling_down": self.cooldown_until > time.time(),
+        }
+
+
+class ModelRegistry:
+    """Holds warm GenerativeModel objects in fallback order"""
+
+    def __init__(self, model_names: list, generation_config: dict = None, error_threshold: int = 3,
+                 latency_threshold: float = 20.0, cooldown: float = 60.0, backend: str = "gemini",
+                 api_key: str = None):
+        self.model_names = model_names
+        self.api_key = api_key
+        # "fake" swaps in fake_llm.FakeGenerativeModel for load tests
+        self.backend = backend
+        self.generation_config = generation_config or {}
+        self.error_threshold = error_threshold
+        self.latency_threshold = latency_threshold
+        self.cooldown = cooldown
+        self.stats = {name: ModelStats() for name in model_names}
+        self._models = {}
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        primary = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+        fallbacks = [name.strip() for name in os.getenv("GEMINI_FALLBACK_MODELS", "").split(",") if name.strip()]
+        generation_config = {}
+        if os.getenv("GEMINI_TEMPERATURE"):
+            generation_config["temperature"] = float(os.getenv("GEMINI_TEMPERATURE"))
+        if os.getenv("GEMINI_MAX_OUTPUT_TOKENS"):
+            generation_config["max_output_tokens"] = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS"))
+        if os.getenv("GEMINI_RESPONSE_MIME_TYPE"):
+            generation_config["response_mime_type"] = os.getenv("GEMINI_RESPONSE_MIME_TYPE")
+        return cls(
+            [primary] + [name for name in fallbacks if name != primary],
+            generation_config=generation_config,
+            error_threshold=int(os.getenv("MODEL_ERROR_THRESHOLD", "3")),
+            latency_threshold=float(os.getenv("MODEL_LATENCY_THRESHOLD", "20")),
+            cooldown=float(os.getenv("MODEL_COOLDOWN", "60")),
+            backend=os.getenv("GEMINI_BACKEND", "gemini").lower(),
+            api_key=os.getenv("GEMINI_API_KEY"),
+        )
+
+    @property
+    def primary(self) -> str:
+        return self.model_names[0]
+
+    def warm(self):
+        """Build every model client up front"""
+        for name in self.model_names:
+            self.get(name)
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            if self.backend == "fake":
+                from fake_llm import FakeGenerativeModel
+                model = FakeGenerativeModel(name, generation_config=self.generation_config or None)
+            else:
+                model = load_sdk(self.api_key).GenerativeModel(name, generation_config=self.generation_config or None)
+            self._models[name] = model
+        return model
+
+    def candidates(self) -> list:
+        """Models to try, in order, skipping those in cooldown (unless all are)"""
+        now = time.time()
+        healthy = [name for name in self.model_names if self.stats[name].cooldown_until <= now]
+        return healthy or list(self.model_names)
+
+    def record_success(self, name: str, latency: float):
+        stats = self.stats[name]
+        stats.calls += 1
+        stats.consecutive_errors = 0
+        stats.latencies.append(latency)
+        # Demote a model whose typical latency has drifted above the threshold
+        if len(stats.latencies) >= 5 and stats.latency_percentile(0.5) > self.latency_threshold:
+            self._cool_down(name, "latency")
+
+    def record_failure(self, name: str, error: Exception):
+        stats = self.stats[name]
+        stats.calls += 1
+        stats.errors += 1
+        stats.consecutive_errors += 1
+        stats.last_error = f"{type(error).__name__}: {error}"[:200]
+        if is_quota_error(error):
+            stats.quota_errors += 1
+            self._cool_down(name, "quota")
+        elif stats.consecutive_errors >= self.error_threshold:
+            self._cool_down(name, "errors")
+
+    def _cool_down(self, name: str, reason: str):
+        if len(self.model_names) > 1:
+            self.stats[name].cooldown_until = time.time() + self.cooldown
+            self.stats[name].latencies.clear()
+            log.warning("model cooling down", extra={"model": name, "reason": reason, "seconds": self.cooldown})
+
+    def as_dict(self) -> dict:
+        return {
+            "primary": self.primary,
+            "backend": self.backend,
+            "chain": self.model_names,
+            "generation_config": self.generation_config,
+            "models": {name: stats.as_dict() for name, stats in self.stats.items()},
+        }
@@ -0,0 +1,137 @@
+"""
+Process-pool PDF text extraction for Career Compass
+
+PyPDF2 is pure Python and CPU bound, so extraction runs in worker
+processes instead of the request handler. Large documents are split
+into page ranges that are extracted in parallel, and page/character
+caps stop work early on oversized uploads.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "200000"))
+PDF_CHUNK_PAGES = int(os.getenv("PDF_CHUNK_PAGES", "8"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool = None
+
+
+class PDFExtractionError(Exception):
+    """Raised when a PDF cannot be parsed"""
+
+
+def _extract_range(source, start: int, stop: int, max_chars: int):
+    """Extract pages [start, stop) in a worker process.
+
+    source is the PDF bytes or a path to it. Returns (page_texts,
+    total_page_count). Stops as soon as max_chars characters have been
+    collected.
+    """
+    try:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+        total_pages = len(reader.pages)
+        parts = []
+        collected = 0
+        for index in range(start, min(stop, total_pages)):
+            page_text = reader.pages[index].extract_text() or ""
+            parts.append(page_text)
+            collected += len(page_text)
+            if collected >= max_chars:
+                break
+        return parts, total_pages
+    except Exception as e:
+        raise PDFExtractionError(str(e))
+
+
+def _import_pdf_reader():
+    import PyPDF2  # noqa: F401
+
+
+def warm_pool():
+    """Start the extraction processes and import PyPDF2 in them before the first PDF arrives"""
+    pool = get_pool()
+    for future in [pool.submit(_import_pdf_reader) for _ in range(PDF_WORKERS)]:
+        future.result()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Return the shared extraction pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        # spawn avoids forking a process that already holds gRPC/event-loop threads
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _assemble(parts: list, max_chars: int) -> tuple:
+    """Join page texts once, respecting the character cap
+
+    Pages are separated by a form feed so running headers and footers can
+    be told apart from repeated content (see prompt_builder.clean_lines).
+    """
+    text = "\n\f".join(parts).strip()
+    truncated = len(text) > max_chars
+    return (text[:max_chars] if truncated else text), truncated
+
+
+async def extract_pdf_text(content, max_pages: int = None, max_chars: int = None) -> dict:
+    """Extract text from a PDF without blocking the event loop.
+
+    content is the PDF bytes or the path of a spooled upload; a path
+    saves copying large files to every worker process. Returns a dict with the text, page counts, whether caps truncated the
+    output and the extraction time in milliseconds.
+    """
+    max_pages = max_pages or PDF_MAX_PAGES
+    max_chars = max_chars or PDF_MAX_CHARS
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    started = time.perf_counter()
+
+    # First chunk also tells us the page count, so small resumes need one round trip
+    first_stop = min(PDF_CHUNK_PAGES, max_pages)
+    parts, total_pages = await loop.run_in_executor(pool, _extract_range, content, 0, first_stop, max_chars)
+    page_limit = min(total_pages, max_pages)
+    collected = sum(len(part) for part in parts)
+
+    if page_limit > first_stop and collected < max_chars:
+        ranges = [
+            (start, min(start + PDF_CHUNK_PAGES, page_limit))
+            for start in range(first_stop, page_limit, PDF_CHUNK_PAGES)
+        ]
+        futures = [
+            loop.run_in_executor(pool, _extract_range, content, start, stop, max_chars)
+            for start, stop in ranges
+        ]
+        try:
+            # Consume chunks in page order and stop once the character cap is hit
+            for future in futures:
+                chunk_parts, _ = await future
+                parts.extend(chunk_parts)
+                collected += sum(len(part) for part in chunk_parts)
+                if collected >= max_chars:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+
+    text, truncated = _assemble(parts, max_chars)
+    return {
+        "text": text,
+        "pages": len(parts),
+        "total_pages": total_pages,
+        "truncated": truncated or total_pages > max_pages,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
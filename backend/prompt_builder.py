@@ -0,0 +1,202 @@
+"""
+Section-aware, token-budgeted document packing for Gemini prompts
+
+Resumes and job descriptions are split into sections (summary, skills,
+experience, requirements, ...), boilerplate such as EEO statements and
+repeated page headers is dropped, and the most valuable sections are
+packed into a token budget instead of cutting the text at a fixed
+character offset.
+"""
+import os
+import re
+from collections import Counter
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+# Share of the budget reserved for the resume; unused tokens flow to the other document
+RESUME_BUDGET_SHARE = float(os.getenv("PROMPT_RESUME_SHARE", "0.55"))
+# Rough characters per token for English prose (Gemini/SentencePiece average)
+CHARS_PER_TOKEN = 4
+# Page separator in extracted text (PDF pages are joined with a form feed)
+PAGE_BREAK = "\f"
+# Lines at the top and bottom of each page checked for running headers/footers
+PAGE_EDGE_LINES = 2
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "objective", "about me", "professional summary", "overview"),
+    "skills": ("skills", "technical skills", "core competencies", "technologies", "tools", "tech stack", "expertise"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "work history"),
+    "projects": ("projects", "personal projects", "key projects"),
+    "education": ("education", "academic background", "certifications", "certification", "courses"),
+    "requirements": ("requirements", "qualifications", "required qualifications", "minimum qualifications",
+                     "what you'll need", "what you need", "must have", "who you are", "required skills"),
+    "responsibilities": ("responsibilities", "what you'll do", "what you will do", "the role", "duties", "key responsibilities"),
+    "preferred": ("preferred qualifications", "nice to have", "preferred", "bonus points", "pluses"),
+    "company": ("about us", "about the company", "who we are", "our company", "company overview"),
+    "benefits": ("benefits", "perks", "what we offer", "compensation"),
+}
+
+# Lower number = packed first
+RESUME_PRIORITY = {"skills": 0, "experience": 1, "summary": 2, "projects": 3, "education": 4, "other": 5}
+JD_PRIORITY = {"requirements": 0, "skills": 0, "responsibilities": 1, "preferred": 2, "summary": 3,
+               "other": 4, "education": 4, "experience": 4, "company": 6, "benefits": 7}
+
+_BOILERPLATE = re.compile(
+    r"equal opportunity employer|without regard to (race|age|sex)|reasonable accommodation|"
+    r"e-verify|affirmative action|protected veteran|sexual orientation|gender identity|"
+    r"page \d+ of \d+|^page \d+$|all rights reserved",
+    re.IGNORECASE,
+)
+_HEADING_LOOKUP = {
+    alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate; avoids a count_tokens round-trip per request"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _heading_section(line: str):
+    """Return the section a heading line opens, or None if the line is not a heading"""
+    stripped = line.strip().strip("#*-•:|").strip()
+    if not stripped or len(stripped) > 40:
+        return None
+    return _HEADING_LOOKUP.get(stripped.lower().rstrip(":").strip())
+
+
+def _page_edges(page_lines: list) -> dict:
+    """{line index: "top" | "bottom"} for the first and last non-blank lines of a page"""
+    content = [index for index, line in enumerate(page_lines) if line.strip()]
+    edges = {index: "bottom" for index in content[-PAGE_EDGE_LINES:]}
+    edges.update({index: "top" for index in content[:PAGE_EDGE_LINES]})
+    return edges
+
+
+def _running_lines(pages: list) -> set:
+    """(edge, line) pairs found at the same edge of more than one page (running headers/footers)"""
+    if len(pages) < 2:
+        return set()
+    counts = Counter()
+    for page in pages:
+        page_lines = page.splitlines()
+        counts.update({(edge, page_lines[index].strip().lower()) for index, edge in _page_edges(page_lines).items()})
+    return {key for key, pages_seen in counts.items() if pages_seen > 1}
+
+
+def clean_lines(text: str) -> list:
+    """Drop boilerplate lines and running page headers/footers after their first occurrence
+
+    Only lines repeated at page edges are deduplicated; repeated lines in
+    the body of a document (e.g. identical bullets) are content and stay.
+    """
+    pages = text.split(PAGE_BREAK)
+    running = _running_lines(pages)
+    seen = set()
+    lines = []
+    for page in pages:
+        page_lines = page.splitlines()
+        edges = _page_edges(page_lines) if running else {}
+        for index, line in enumerate(page_lines):
+            stripped = line.strip()
+            if not stripped:
+                if lines and lines[-1]:
+                    lines.append("")
+                continue
+            if _BOILERPLATE.search(stripped):
+                continue
+            key = stripped.lower()
+            if (edges.get(index), key) in running:
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.append(stripped)
+    return lines
+
+
+def split_sections(text: str) -> list:
+    """Split a document into [(section_name, text)] in document order"""
+    sections = []
+    # Preamble before the first heading (name, contact, job title) counts as "other"
+    name, current = "other", []
+    for line in clean_lines(text):
+        section = _heading_section(line)
+        if section is not None:
+            if any(current):
+                sections.append((name, "\n".join(current).strip()))
+            name, current = section, [line]
+        else:
+            current.append(line)
+    if any(current):
+        sections.append((name, "\n".join(current).strip()))
+    return sections
+
+
+def _truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text at a line boundary so it fits the token allowance"""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip()
+
+
+def _section_cost(body: str) -> int:
+    # Each kept section also pays for the blank line that joins it to the next
+    return estimate_tokens(body) + 1
+
+
+def packed_cost(sections: list) -> int:
+    """Tokens pack_document charges to keep every section"""
+    return sum(_section_cost(body) for _, body in sections)
+
+
+def pack_document(text: str, budget: int, priority: dict, sections: list = None) -> dict:
+    """Keep the highest-priority sections of a document within a token budget"""
+    if sections is None:
+        sections = split_sections(text)
+    order = sorted(range(len(sections)), key=lambda i: (priority.get(sections[i][0], priority["other"]), i))
+    kept = {}
+    remaining = budget
+    dropped = []
+    truncated = False
+    for index in order:
+        name, body = sections[index]
+        cost = _section_cost(body)
+        if cost <= remaining:
+            kept[index] = body
+            remaining -= cost
+        elif remaining > 50:
+            kept[index] = _truncate_to_tokens(body, remaining - 1)
+            remaining = 0
+            truncated = True
+        else:
+            dropped.append(name)
+    packed = "\n\n".join(kept[index] for index in sorted(kept))
+    return {
+        "text": packed,
+        "tokens": estimate_tokens(packed),
+        "sections": [sections[index][0] for index in sorted(kept)],
+        "dropped": dropped,
+        "truncated": truncated or bool(dropped),
+    }
+
+
+def pack_documents(resume_text: str, job_description: str, budget: int = None) -> dict:
+    """Pack a resume and job description into one shared token budget"""
+    budget = budget or PROMPT_TOKEN_BUDGET
+    resume_budget = int(budget * RESUME_BUDGET_SHARE)
+    resume_sections = split_sections(resume_text)
+    jd_sections = split_sections(job_description)
+    # Costs as pack_document charges them, so a document given its full cost keeps every section
+    resume_cost = packed_cost(resume_sections)
+    jd_cost = packed_cost(jd_sections)
+    # Hand budget the shorter document does not need to the longer one
+    if resume_cost < resume_budget:
+        resume_budget = resume_cost
+    jd_budget = budget - resume_budget
+    if jd_cost < jd_budget:
+        resume_budget = max(resume_budget, budget - jd_cost)
+        jd_budget = budget - resume_budget
+    resume = pack_document(resume_text, resume_budget, RESUME_PRIORITY, resume_sections)
+    jd = pack_document(job_description, jd_budget, JD_PRIORITY, jd_sections)
+    return {"resume": resume, "job_description": jd, "tokens": resume["tokens"] + jd["tokens"]}
@@ -0,0 +1,151 @@
+"""
+Per-request stage timing (Server-Timing) and opt-in request profiling
+
+stage() times a pipeline stage into the stage histogram and, while a
+request is being served, into that request's list of spans. The
+middleware returns the spans as a Server-Timing header, which browser dev
+tools show next to the network timings. It can also profile a request,
+either on demand with the X-Profile header or for a random sample of
+requests, and write the dump to PROFILE_DIR.
+"""
+import contextvars
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+
+from metrics import STAGE_SECONDS
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+log = logging.getLogger("career_compass.profiling")
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# X-Profile must carry this token; when unset the header is ignored
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# cprofile (deterministic, whole event loop) or sampling (pyinstrument, this request only)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cprofile")
+
+_spans = contextvars.ContextVar("request_spans", default=None)
+_profiling = False
+
+
+def record_stage(name: str, seconds: float):
+    STAGE_SECONDS.labels(name).observe(seconds)
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage for /metrics and the current request's Server-Timing"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def server_timing(spans: list, total: float) -> str:
+    """Format spans as a Server-Timing value, summing repeated stages"""
+    durations = {}
+    for name, seconds in spans:
+        durations[name] = durations.get(name, 0.0) + seconds
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class _RequestProfile:
+    """One profiler run, written to PROFILE_DIR when the request finishes"""
+
+    def __init__(self, method: str, path: str):
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        self.name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{method.lower()}-{slug}-{random.randrange(16 ** 6):06x}"
+        if PROFILE_MODE == "sampling" and SamplingProfiler is not None:
+            self.profiler = SamplingProfiler(async_mode="enabled")
+            self.filename = f"{self.name}.html"
+        else:
+            self.profiler = cProfile.Profile()
+            self.filename = f"{self.name}.prof"
+
+    def start(self):
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, self.filename)
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.disable()
+            self.profiler.dump_stats(path)
+        else:
+            self.profiler.stop()
+            with open(path, "w", encoding="utf-8") as report:
+                report.write(self.profiler.output_html())
+
+
+def _wants_profile(headers: dict) -> bool:
+    token = headers.get(b"x-profile")
+    if token is not None and PROFILE_TOKEN and token.decode("latin-1") == PROFILE_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding Server-Timing to responses and profiling selected requests
+
+    Spans recorded after the response has started (e.g. a streamed Gemini
+    reply) only reach /metrics. cProfile sees everything on the event loop
+    thread, including concurrent requests; only one request is profiled at
+    a time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _profiling
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans = []
+        token = _spans.set(spans)
+        started = time.perf_counter()
+        profile = None
+        if not _profiling and _wants_profile(dict(scope["headers"])):
+            profile = _RequestProfile(scope["method"], scope["path"])
+            _profiling = True
+            profile.start()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(spans, time.perf_counter() - started).encode()))
+                headers.append((b"timing-allow-origin", b"*"))
+                if profile is not None:
+                    headers.append((b"x-profile-id", profile.filename.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _spans.reset(token)
+            if profile is not None:
+                profile.stop()
+                _profiling = False
+                log.info("profile written", extra={
+                    "profile_id": profile.filename, "path": os.path.join(PROFILE_DIR, profile.filename),
+                })
@@ -0,0 +1,364 @@
+"""
+Parsing, repair and schema validation of Gemini analysis output
+
+Gemini is asked for a JSON object but regularly wraps it in code fences
+or prose, leaves trailing commas, or stops mid-array when it hits the
+output limit. This module repairs those defects locally, validates the
+result against the AnalysisResponse fields and can also pull fields out
+of a response incrementally while it is still streaming.
+"""
+import json
+import re
+
+ANALYSIS_FIELDS = ("fit_score", "feedback", "skills_match", "improvement_suggestions", "missing_skills")
+_CODE_FENCE = re.compile(r"```[a-zA-Z]*")
+_SMART_QUOTES = ("\u201c", "\u201d")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_WORD = re.compile(r"[A-Za-z]+")
+
+_FIELD_PATTERN = '"{}"\\s*:\\s*'
+_WHITESPACE = " \t\r\n"
+
+
+def _skip_whitespace(buffer: str, index: int) -> int:
+    while index < len(buffer) and buffer[index] in _WHITESPACE:
+        index += 1
+    return index
+
+
+def _scan_value(buffer: str, index: int):
+    """Return the end index of the JSON value starting at index, or None if incomplete"""
+    if index >= len(buffer):
+        return None
+    char = buffer[index]
+    if char == '"':
+        position = index + 1
+        while position < len(buffer):
+            if buffer[position] == "\\":
+                position += 2
+                continue
+            if buffer[position] == '"':
+                return position + 1
+            position += 1
+        return None
+    if char in "{[":
+        depth = 0
+        in_string = False
+        position = index
+        while position < len(buffer):
+            current = buffer[position]
+            if in_string:
+                if current == "\\":
+                    position += 1
+                elif current == '"':
+                    in_string = False
+            elif current == '"':
+                in_string = True
+            elif current in "{[":
+                depth += 1
+            elif current in "}]":
+                depth -= 1
+                if depth == 0:
+                    return position + 1
+            position += 1
+        return None
+    # Number or literal: complete once a delimiter follows it
+    match = re.match(r"[-+0-9.eE]+|true|false|null", buffer[index:])
+    if match is None:
+        return None
+    end = index + match.end()
+    return end if end < len(buffer) else None
+
+
+class IncrementalAnalysisParser:
+    """Extracts analysis fields from partial JSON as Gemini streams it.
+
+    feed() returns a list of (event, value) pairs for every field that
+    became complete with the new chunk. Each element of
+    improvement_suggestions is reported on its own as soon as it closes.
+    result() parses, repairs and validates everything received so far.
+    """
+
+    SCALAR_FIELDS = ("fit_score", "feedback", "skills_match", "missing_skills")
+
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = set()
+        self.suggestions_emitted = 0
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        events = []
+        for field in self.SCALAR_FIELDS:
+            if field in self.emitted:
+                continue
+            value = self._complete_field(field)
+            if value is not None:
+                self.emitted.add(field)
+                events.append((field, value))
+        for suggestion in self._new_suggestions():
+            events.append(("suggestion", suggestion))
+        return events
+
+    def result(self, fallback: dict = None) -> dict:
+        return parse_analysis(self.buffer, fallback)
+
+    def _field_start(self, field: str):
+        match = re.search(_FIELD_PATTERN.format(field), self.buffer)
+        return match.end() if match else None
+
+    def _complete_field(self, field: str):
+        start = self._field_start(field)
+        if start is None:
+            return None
+        end = _scan_value(self.buffer, start)
+        if end is None:
+            return None
+        try:
+            return json.loads(self.buffer[start:end])
+        except ValueError:
+            return None
+
+    def _new_suggestions(self) -> list:
+        start = self._field_start("improvement_suggestions")
+        if start is None or start >= len(self.buffer) or self.buffer[start] != "[":
+            return []
+        suggestions = []
+        index = start + 1
+        count = 0
+        while True:
+            index = _skip_whitespace(self.buffer, index)
+            if index >= len(self.buffer) or self.buffer[index] == "]":
+                break
+            end = _scan_value(self.buffer, index)
+            if end is None:
+                break
+            if count >= self.suggestions_emitted:
+                try:
+                    suggestions.append(json.loads(self.buffer[index:end]))
+                except ValueError:
+                    break
+            count += 1
+            index = _skip_whitespace(self.buffer, end)
+            if index < len(self.buffer) and self.buffer[index] == ",":
+                index += 1
+        self.suggestions_emitted += len(suggestions)
+        return suggestions
+
+
+def extract_json_candidate(text: str):
+    """Return the JSON object in text that looks most like an analysis.
+
+    Balanced objects are compared by how many analysis fields they name
+    (so an example snippet in surrounding prose loses to the real answer);
+    an unterminated object at the end is returned as-is for repair.
+    """
+    # Smart quotes are left alone here: inside valid JSON strings they are content
+    text = _CODE_FENCE.sub("", text)
+    best, best_fields = None, -1
+    start = text.find("{")
+    attempts = 0
+    while start != -1 and attempts < 5:
+        end = _scan_value(text, start)
+        candidate = text[start:] if end is None else text[start:end]
+        fields = sum(f'"{field}"' in candidate or f"\u201c{field}\u201d" in candidate for field in ANALYSIS_FIELDS)
+        if fields > best_fields:
+            best, best_fields = candidate, fields
+        if end is None:
+            break
+        start = text.find("{", end)
+        attempts += 1
+    return best
+
+
+def repair_json(text: str) -> str:
+    """Fix common LLM JSON defects in a single pass.
+
+    Handles trailing commas, // comments, Python literals, raw newlines
+    inside strings, smart quotes used as string delimiters and truncation
+    (unterminated strings, dangling keys and unclosed arrays/objects).
+    Smart quotes inside a string opened with a plain quote are content and
+    are kept.
+    """
+    output = []
+    stack = []
+    in_string = False
+    # Characters that close the current string: a plain quote, or either smart quote after a smart opening
+    closers = ('"',)
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if in_string:
+            if char == "\\" and index + 1 < length:
+                output.append(text[index:index + 2])
+                index += 2
+                continue
+            if char in closers:
+                in_string = False
+                char = '"'
+            elif char == "\n":
+                char = "\\n"
+            output.append(char)
+        elif char == '"' or char in _SMART_QUOTES:
+            in_string = True
+            closers = ('"',) if char == '"' else ('"',) + _SMART_QUOTES
+            output.append('"')
+        elif char == "/" and text.startswith("//", index):
+            newline = text.find("\n", index)
+            index = length if newline == -1 else newline
+            continue
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            output.append(char)
+        elif char in "}]":
+            _drop_trailing_comma(output)
+            if stack:
+                stack.pop()
+            output.append(char)
+            if not stack:
+                break
+        elif char.isascii() and char.isalpha():
+            word = _WORD.match(text, index).group()
+            output.append(_PYTHON_LITERALS.get(word, word))
+            index += len(word)
+            continue
+        else:
+            output.append(char)
+        index += 1
+
+    if in_string:
+        output.append('"')
+    # Truncated mid key/value: drop the dangling part before closing containers
+    tail = "".join(output).rstrip()
+    tail = re.sub(r',\s*"[^"]*"\s*$', "", tail) if stack and stack[-1] == "}" else tail
+    tail = re.sub(r'[,:]\s*$', lambda m: ": null" if m.group().startswith(":") else "", tail)
+    return tail + "".join(reversed(stack))
+
+
+def _drop_trailing_comma(output: list):
+    position = len(output) - 1
+    while position >= 0 and output[position] in (" ", "\t", "\r", "\n"):
+        position -= 1
+    if position >= 0 and output[position] == ",":
+        del output[position]
+
+
+def _as_string_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [line.strip(" -•*\t") for line in value.splitlines() if line.strip(" -•*\t")]
+    if isinstance(value, dict):
+        value = list(value.values())
+    if not isinstance(value, list):
+        return [str(value)]
+    return [item if isinstance(item, str) else json.dumps(item) if isinstance(item, (dict, list)) else str(item)
+            for item in value if item is not None]
+
+
+def _as_score(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        score = float(value)
+    elif isinstance(value, str):
+        match = re.search(r"\d+(?:\.\d+)?", value)
+        if match is None:
+            return None
+        score = float(match.group())
+    else:
+        return None
+    return max(0, min(100, int(round(score))))
+
+
+def validate_analysis(data: dict, fallback: dict = None) -> tuple:
+    """Coerce parsed output to the AnalysisResponse field types.
+
+    Missing or invalid fields come from fallback. Returns (analysis, issues)
+    where issues lists every field that had to be fixed.
+    """
+    fallback = fallback or {}
+    issues = []
+    result = dict(data) if isinstance(data, dict) else {}
+
+    score = _as_score(result.get("fit_score"))
+    if score is None:
+        issues.append("fit_score")
+        score = _as_score(fallback.get("fit_score")) or 0
+    result["fit_score"] = score
+
+    feedback = result.get("feedback")
+    if isinstance(feedback, (dict, list)):
+        issues.append("feedback")
+        feedback = json.dumps(feedback)
+    if not isinstance(feedback, str) or not feedback.strip():
+        issues.append("feedback")
+        feedback = fallback.get("feedback", "")
+    result["feedback"] = feedback
+
+    skills_match = result.get("skills_match")
+    if isinstance(skills_match, list):
+        issues.append("skills_match")
+        skills_match = {"matched": skills_match}
+    if not isinstance(skills_match, dict) or not skills_match:
+        issues.append("skills_match")
+        skills_match = fallback.get("skills_match", {})
+    result["skills_match"] = {
+        "matched": _as_string_list(skills_match.get("matched")),
+        "missing": _as_string_list(skills_match.get("missing")),
+    }
+
+    for field in ("improvement_suggestions", "missing_skills"):
+        value = result.get(field)
+        if value is None:
+            issues.append(field)
+            value = fallback.get(field)
+            if value is None and field == "missing_skills":
+                value = result["skills_match"]["missing"]
+        elif not isinstance(value, list):
+            issues.append(field)
+        result[field] = _as_string_list(value)
+
+    return result, sorted(set(issues))
+
+
+def _score_from_prose(text: str):
+    for line in text.split("\n"):
+        if "score" in line.lower():
+            numbers = re.findall(r"\d+", line)
+            if numbers:
+                return min(int(numbers[0]), 100)
+    return None
+
+
+def parse_analysis(response_text: str, fallback: dict = None) -> dict:
+    """Parse a complete Gemini response into a validated analysis dict
+
+    Tries strict JSON, then local repair, then field-by-field extraction,
+    and finally treats the response as prose. The returned dict carries a
+    "parse" entry describing which stage succeeded and what was fixed.
+    """
+    data = None
+    stage = "prose"
+    candidate = extract_json_candidate(response_text)
+    if candidate is not None:
+        try:
+            data, stage = json.loads(candidate), "json"
+        except ValueError:
+            try:
+                data, stage = json.loads(repair_json(candidate)), "repaired"
+            except ValueError:
+                parser = IncrementalAnalysisParser()
+                events = parser.feed(candidate + "\n")
+                if events:
+                    data = {field: value for field, value in events if field != "suggestion"}
+                    data["improvement_suggestions"] = [value for field, value in events if field == "suggestion"] or None
+                    stage = "partial"
+    if not isinstance(data, dict):
+        data = {"fit_score": _score_from_prose(response_text), "feedback": response_text}
+        stage = "prose"
+
+    analysis, issues = validate_analysis(data, fallback)
+    analysis["parse"] = {"stage": stage, "repaired_fields": issues}
+    return analysis
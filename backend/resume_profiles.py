@@ -0,0 +1,312 @@
+"""
+Persistent resume profiles for repeat comparisons
+
+A resume is distilled once into a compact structured profile (summary,
+skills by category, roles with years and their quantified highlights,
+education) and stored under a content-derived profile id. Analyses that
+reference the id send the rendered profile plus the job description to
+Gemini instead of the full resume text, so a student comparing against
+dozens of postings pays for the resume tokens only once.
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from cache import LRUCache, normalize_text, reopen_after_fork
+from local_analyzer import get_taxonomy
+from prompt_builder import estimate_tokens, split_sections
+
+# Bump whenever distillation or rendering changes; part of the profile id and analysis cache key
+PROFILE_VERSION = "p1"
+
+MAX_SUMMARY_CHARS = 300
+MAX_ROLES = 8
+# Only the most recent roles keep highlights; older ones are listed by title and years
+DETAILED_ROLES = 3
+MAX_HIGHLIGHTS_PER_ROLE = 2
+MAX_HIGHLIGHT_CHARS = 120
+MAX_EDUCATION = 4
+MAX_PROJECTS = 4
+
+_YEAR = r"(?:19|20)\d{2}"
+_DATE_RANGE = re.compile(
+    rf"(?:[a-z]{{3,9}}\.?\s+)?({_YEAR})\s*(?:-|–|—|to)\s*(?:[a-z]{{3,9}}\.?\s+)?({_YEAR}|present|current|now|today)",
+    re.IGNORECASE,
+)
+_STATED_YEARS = re.compile(r"(\d{1,2})\+?\s*(?:years|yrs)", re.IGNORECASE)
+_TITLE_SEPARATORS = re.compile(r"\s+(?:-|–|—|@|at|\|)\s+|,\s+")
+_BULLET = re.compile(r"^[-•*▪◦·]\s*")
+_CONTACT = re.compile(r"@|https?://|www\.|\+?\d[\d\s().-]{7,}\d")
+_QUANTIFIED = re.compile(r"\d")
+
+
+def profile_id(resume_text: str) -> str:
+    """Same resume (up to whitespace) -> same id, so re-uploads reuse the stored profile"""
+    digest = hashlib.sha256(f"{PROFILE_VERSION}\x00{normalize_text(resume_text)}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def _body_lines(section_text: str) -> list:
+    """Lines of a section without its heading line"""
+    lines = [line for line in section_text.splitlines() if line.strip()]
+    return lines[1:] if lines else []
+
+
+def _clip_sentences(text: str, limit: int) -> str:
+    """Whole sentences up to limit characters (at least the first sentence, cut at limit)"""
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(". ", 0, limit)
+    return text[:cut + 1] if cut > 0 else text[:limit].rstrip()
+
+
+def _clip_words(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip(" ,;") + "…"
+
+
+def _parse_role(line: str, match) -> dict:
+    start = int(match.group(1))
+    end_text = match.group(2).lower()
+    end = datetime.date.today().year if not end_text[0].isdigit() else int(end_text)
+    heading = (line[:match.start()] + line[match.end():]).strip(" ()[]|,-–—")
+    parts = [part.strip(" ()[]") for part in _TITLE_SEPARATORS.split(heading) if part.strip(" ()[]")]
+    return {
+        "title": parts[0] if parts else heading,
+        "organization": ", ".join(parts[1:]) or None,
+        "start": start,
+        "end": end if end_text[0].isdigit() else "present",
+        "years": max(end - start, 0),
+        "highlights": [],
+        "_span": (start, end),
+    }
+
+
+def _roles(sections: list) -> list:
+    """Roles from experience/other sections: a line with a year range opens a role, bullets below are its highlights"""
+    roles = []
+    for name, text in sections:
+        if name not in ("experience", "other"):
+            continue
+        role = None
+        for line in _body_lines(text) if name == "experience" else text.splitlines():
+            match = _DATE_RANGE.search(line)
+            if match and len(line) < 160:
+                role = _parse_role(line, match)
+                roles.append(role)
+            elif role is not None and _QUANTIFIED.search(line) and len(role["highlights"]) < MAX_HIGHLIGHTS_PER_ROLE:
+                # Quantified bullets carry the evidence Gemini weighs most; generic duties are dropped
+                role["highlights"].append(_clip_words(_BULLET.sub("", line.strip()), MAX_HIGHLIGHT_CHARS))
+    # Most recent first (document order breaks ties)
+    roles = sorted(roles, key=lambda role: role["_span"][::-1], reverse=True)[:MAX_ROLES]
+    for role in roles[DETAILED_ROLES:]:
+        role["highlights"] = []
+    return roles
+
+
+def _years_experience(roles: list, sections: list):
+    """Union of role date ranges, or a "N+ years" claim in the summary"""
+    spans = sorted(role["_span"] for role in roles)
+    total = 0
+    covered_until = None
+    for start, end in spans:
+        if covered_until is not None and start < covered_until:
+            start = covered_until
+        if end > start:
+            total += end - start
+        covered_until = max(covered_until or end, end)
+    if total:
+        return total
+    for name, text in sections:
+        if name in ("summary", "other"):
+            match = _STATED_YEARS.search(text)
+            if match:
+                return int(match.group(1))
+    return None
+
+
+def distill_profile(resume_text: str) -> dict:
+    """Compact structured profile of a resume, built locally without an LLM call"""
+    taxonomy = get_taxonomy()
+    sections = split_sections(resume_text)
+    by_name = {}
+    for name, text in sections:
+        by_name.setdefault(name, []).append(text)
+
+    summary = " ".join(" ".join(_body_lines(text)) for text in by_name.get("summary", []))
+    headline = None
+    preamble = by_name.get("other", [""])[0].splitlines()
+    # Second preamble line is usually the current title; the first is the name, which Gemini does not need
+    for line in preamble[1:3]:
+        if line.strip() and not _CONTACT.search(line) and not _DATE_RANGE.search(line):
+            headline = line.strip()[:80]
+            break
+
+    skills = {}
+    for skill, _ in taxonomy.extract(resume_text).most_common():
+        skills.setdefault(taxonomy.categories.get(skill, "Other"), []).append(skill)
+
+    roles = _roles(sections)
+    years = _years_experience(roles, sections)
+    for role in roles:
+        del role["_span"]
+
+    education = [
+        _BULLET.sub("", line.strip())[:120]
+        for text in by_name.get("education", [])
+        for line in _body_lines(text)
+    ][:MAX_EDUCATION]
+    projects = [
+        _clip_words(_BULLET.sub("", line.strip()), MAX_HIGHLIGHT_CHARS)
+        for text in by_name.get("projects", [])
+        for line in _body_lines(text)
+    ][:MAX_PROJECTS]
+
+    return {
+        "version": PROFILE_VERSION,
+        "headline": headline,
+        "summary": _clip_sentences(summary, MAX_SUMMARY_CHARS) or None,
+        "years_experience": years,
+        "skills": skills,
+        "roles": roles,
+        "education": education,
+        "projects": projects,
+    }
+
+
+def render_profile(profile: dict) -> str:
+    """Render a profile as the compact text block sent to Gemini in place of the resume"""
+    lines = []
+    if profile.get("headline"):
+        lines.append(f"Headline: {profile['headline']}")
+    if profile.get("years_experience") is not None:
+        lines.append(f"Total experience: {profile['years_experience']} years")
+    if profile.get("summary"):
+        lines.append(f"Summary: {profile['summary']}")
+    if profile.get("skills"):
+        lines.append("Skills:")
+        lines.extend(f"- {category}: {', '.join(skills)}" for category, skills in profile["skills"].items())
+    if profile.get("roles"):
+        lines.append("Roles:")
+        for role in profile["roles"]:
+            where = f", {role['organization']}" if role.get("organization") else ""
+            lines.append(f"- {role['title']}{where} ({role['start']}-{role['end']}, {role['years']} yrs)")
+            lines.extend(f"  * {highlight}" for highlight in role["highlights"])
+    if profile.get("projects"):
+        lines.append("Projects:")
+        lines.extend(f"- {project}" for project in profile["projects"])
+    if profile.get("education"):
+        lines.append("Education:")
+        lines.extend(f"- {entry}" for entry in profile["education"])
+    return "\n".join(lines)
+
+
+class ProfileStore:
+    """SQLite-backed store of distilled profiles and their source resumes
+
+    The resume text is kept (zlib-compressed) for the local analysis that
+    backs up Gemini's answer; only the rendered profile goes into prompts.
+    A small in-memory LRU keeps hot profiles off the database; its short
+    TTL bounds how long other workers keep serving a deleted profile.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = LRUCache(max_entries=512, max_bytes=16 * 1024 * 1024, ttl=300)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = self._connect()
+        reopen_after_fork(self)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "id TEXT PRIMARY KEY, profile TEXT NOT NULL, resume BLOB NOT NULL, "
+            "created_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls) -> "ProfileStore":
+        return cls(
+            os.getenv("PROFILES_DB", "cache/profiles.db"),
+            max_entries=int(os.getenv("PROFILES_MAX_ENTRIES", "10000")),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def create(self, resume_text: str) -> tuple:
+        """Distill and store a resume; returns (profile_id, entry, created)"""
+        key = profile_id(resume_text)
+        entry = self.get(key)
+        if entry is not None:
+            return key, entry, False
+        entry = {"profile": distill_profile(resume_text), "resume_text": resume_text}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (id, profile, resume, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(entry["profile"]), zlib.compress(resume_text.encode("utf-8")), now, now),
+            )
+            self._evict()
+        self.memory.set(key, entry, size=len(resume_text))
+        return key, entry, True
+
+    def get(self, key: str):
+        """{"profile", "resume_text"} for a profile id, or None"""
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        with self._lock:
+            row = self._conn.execute("SELECT profile, resume FROM profiles WHERE id = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE profiles SET used_at = ? WHERE id = ?", (time.time(), key))
+        if row is None:
+            self.misses += 1
+            return None
+        entry = {"profile": json.loads(row[0]), "resume_text": zlib.decompress(row[1]).decode("utf-8")}
+        self.memory.set(key, entry, size=len(entry["resume_text"]))
+        self.hits += 1
+        return entry
+
+    def delete(self, key: str) -> bool:
+        self.memory.delete(key)
+        with self._lock:
+            return self._conn.execute("DELETE FROM profiles WHERE id = ?", (key,)).rowcount > 0
+
+    def _evict(self):
+        # Least recently used profiles go first once the store is full
+        self._conn.execute(
+            "DELETE FROM profiles WHERE id IN (SELECT id FROM profiles ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def stats(self) -> dict:
+        return {"profiles": len(self), "hits": self.hits, "misses": self.misses, "path": self.path}
+
+
+def describe(key: str, entry: dict) -> dict:
+    """API view of a stored profile with its prompt-size saving"""
+    rendered = render_profile(entry["profile"])
+    return {
+        "profile_id": key,
+        "profile": entry["profile"],
+        "resume_tokens": estimate_tokens(entry["resume_text"]),
+        "profile_tokens": estimate_tokens(rendered),
+    }
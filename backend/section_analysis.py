@@ -0,0 +1,165 @@
+"""
+Incremental re-analysis of edited resumes, one section at a time
+
+The resume is split into sections and each section is analyzed against
+the job description on its own, cached under the hash of the section
+text, the job description, the model and the prompt version. When a user
+edits one bullet and re-runs the analysis, only the edited section goes
+to Gemini; the overall fit_score, feedback, skills and suggestions are
+recomposed from the cached section results. The section hashes of the
+last version of each document are kept so the response can say which
+sections changed.
+"""
+import hashlib
+import json
+import os
+
+from cache import LRUCache, SQLiteStore, normalize_text
+from prompt_builder import split_sections
+
+# Bump whenever the section prompt changes so stale section results are not served
+SECTION_PROMPT_VERSION = "s1"
+
+# Share of the overall fit_score each section type carries (renormalized over the sections present)
+SECTION_WEIGHTS = {"experience": 0.35, "skills": 0.25, "projects": 0.15, "summary": 0.1, "education": 0.1, "other": 0.1}
+DEFAULT_SECTION_WEIGHT = 0.05
+MAX_SUGGESTIONS = 8
+
+
+def section_hash(name: str, text: str) -> str:
+    return hashlib.sha256(f"{name}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()[:16]
+
+
+def plan_sections(resume_text: str) -> list:
+    """[{"name", "text", "hash"}] for the sections that are analyzed, in document order
+
+    The preamble before the first heading (name, contact details) is not
+    analyzed when the resume has headed sections; a resume without any
+    recognised heading is analyzed as a single section.
+    """
+    sections = split_sections(resume_text)
+    if len(sections) > 1 and sections[0][0] == "other":
+        sections = sections[1:]
+    return [{"name": name, "text": text, "hash": section_hash(name, text)} for name, text in sections]
+
+
+def diff_sections(previous: list, sections: list) -> dict:
+    """Compare section hashes with the previous version of the document"""
+    if previous is None:
+        return {"previous_version": False, "changed": [section["name"] for section in sections],
+                "unchanged": [], "removed": []}
+    previous_hashes = {section_hash for _, section_hash in previous}
+    current_hashes = {section["hash"] for section in sections}
+    return {
+        "previous_version": True,
+        "changed": [section["name"] for section in sections if section["hash"] not in previous_hashes],
+        "unchanged": [section["name"] for section in sections if section["hash"] in previous_hashes],
+        "removed": [name for name, section_hash in previous if section_hash not in current_hashes],
+    }
+
+
+def _first_sentences(text: str, count: int = 2) -> str:
+    sentences = text.strip().split(". ")
+    clipped = ". ".join(sentences[:count])
+    return clipped if clipped.endswith(".") or len(sentences) <= count else clipped + "."
+
+
+def _merge_unique(lists, exclude=()) -> list:
+    """Ordered case-insensitive union of string lists"""
+    seen = {item.lower() for item in exclude}
+    merged = []
+    for items in lists:
+        for item in items:
+            if item.lower() not in seen:
+                seen.add(item.lower())
+                merged.append(item)
+    return merged
+
+
+def compose_analysis(sections: list, results: list) -> dict:
+    """Recompose one analysis from per-section results
+
+    results holds (analysis, cached) per section. fit_score is the
+    weighted mean of the section scores; longer sections of the same
+    type weigh more. Suggestions are interleaved across sections, most
+    heavily weighted section first.
+    """
+    totals = {}
+    for section in sections:
+        totals[section["name"]] = totals.get(section["name"], 0) + len(section["text"])
+    weights = [
+        SECTION_WEIGHTS.get(section["name"], DEFAULT_SECTION_WEIGHT) * len(section["text"]) / max(totals[section["name"]], 1)
+        for section in sections
+    ]
+    total_weight = sum(weights) or 1.0
+    fit_score = int(round(sum(weight * analysis["fit_score"] for weight, (analysis, _) in zip(weights, results)) / total_weight))
+
+    feedback = " ".join(
+        f"{section['name'].capitalize()}: {_first_sentences(analysis['feedback'])}"
+        for section, (analysis, _) in zip(sections, results) if analysis["feedback"].strip()
+    )
+    matched = _merge_unique(analysis["skills_match"]["matched"] for analysis, _ in results)
+    missing = _merge_unique(
+        (analysis["skills_match"]["missing"] + analysis["missing_skills"] for analysis, _ in results), exclude=matched
+    )
+
+    by_weight = sorted(range(len(sections)), key=lambda index: weights[index], reverse=True)
+    queues = [list(results[index][0]["improvement_suggestions"]) for index in by_weight]
+    interleaved = []
+    while any(queues) and len(interleaved) < MAX_SUGGESTIONS * 2:
+        interleaved.append([queue.pop(0) for queue in queues if queue])
+    suggestions = _merge_unique(interleaved)[:MAX_SUGGESTIONS]
+
+    return {
+        "fit_score": fit_score,
+        "feedback": feedback,
+        "skills_match": {"matched": matched, "missing": missing},
+        "improvement_suggestions": suggestions,
+        "missing_skills": missing,
+        "source": "local" if all(analysis.get("source") == "local" for analysis, _ in results) else "gemini",
+        "sections": [
+            {"name": section["name"], "hash": section["hash"], "fit_score": analysis["fit_score"], "cached": cached}
+            for section, (analysis, cached) in zip(sections, results)
+        ],
+    }
+
+
+class DocumentVersions:
+    """Section hashes of the last successfully analyzed version of each document
+
+    With ANALYSIS_CACHE_DB set the versions live only in that SQLite file,
+    so every worker reads the same previous version; otherwise they are
+    kept in a per-process LRU.
+    """
+
+    def __init__(self, memory: LRUCache, disk: SQLiteStore = None):
+        self.memory = memory
+        self.disk = disk
+
+    @classmethod
+    def from_env(cls) -> "DocumentVersions":
+        ttl = float(os.getenv("DOCUMENT_VERSION_TTL", str(7 * 86400)))
+        memory = LRUCache(max_entries=4096, max_bytes=8 * 1024 * 1024, ttl=ttl)
+        disk = None
+        db_path = os.getenv("ANALYSIS_CACHE_DB")
+        if db_path:
+            disk = SQLiteStore(db_path, table="document_versions", ttl=ttl, max_entries=50000)
+        return cls(memory, disk)
+
+    def get(self, document_id: str):
+        if self.disk is not None:
+            raw = self.disk.get(document_id)
+            return json.loads(raw) if raw is not None else None
+        return self.memory.get(document_id)
+
+    def diff(self, document_id: str, sections: list) -> dict:
+        """Diff this version's sections against the stored previous version"""
+        return diff_sections(self.get(document_id), sections)
+
+    def store(self, document_id: str, sections: list):
+        """Remember this version; call once its analysis has succeeded"""
+        current = [[section["name"], section["hash"]] for section in sections]
+        if self.disk is not None:
+            self.disk.set(document_id, json.dumps(current))
+        else:
+            self.memory.set(document_id, current, size=len(json.dumps(current)))
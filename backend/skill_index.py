@@ -0,0 +1,152 @@
+"""
+Aho-Corasick skill dictionary index
+
+Finds every skill alias in a document in a single pass over the text,
+independent of how many aliases the taxonomy holds. Matching is
+case-insensitive, respects token boundaries and resolves aliases to
+canonical skill names. The compiled automaton can be pickled to a
+prebuilt file so workers do not rebuild it on every start.
+
+Usage:
+    python skill_index.py build [output_path]
+"""
+import logging
+import os
+import pickle
+import re
+import sys
+from collections import Counter, deque
+
+log = logging.getLogger("career_compass.skills")
+
+INDEX_FORMAT_VERSION = 1
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace runs so aliases match across line breaks"""
+    return _WHITESPACE.sub(" ", text.lower())
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char in "+#"
+
+
+class SkillIndex:
+    """Compiled Aho-Corasick automaton mapping aliases to canonical skills"""
+
+    def __init__(self, aliases: dict):
+        """aliases maps alias text to its canonical skill name"""
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+        self.canonical = []
+        canonical_ids = {}
+
+        for alias, canonical in aliases.items():
+            pattern = normalize(alias).strip()
+            if not pattern:
+                continue
+            if canonical not in canonical_ids:
+                canonical_ids[canonical] = len(self.canonical)
+                self.canonical.append(canonical)
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append(())
+                state = next_state
+            self.outputs[state] = ((len(pattern), canonical_ids[canonical]),)
+
+        # Breadth-first pass sets failure links and merges suffix outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                if self.outputs[self.fail[next_state]]:
+                    self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    @property
+    def size(self) -> int:
+        return len(self.goto)
+
+    def find_all(self, text: str) -> list:
+        """Return non-overlapping (start, end, canonical) matches, leftmost-longest first"""
+        text = normalize(text)
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        candidates = []
+        state = 0
+        length = len(text)
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            end = position + 1
+            if end < length and _is_word_char(text[end]) and _is_word_char(char):
+                continue
+            for pattern_length, canonical_id in outputs[state]:
+                start = end - pattern_length
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                candidates.append((start, -pattern_length, canonical_id))
+
+        matches = []
+        covered_until = 0
+        for start, negative_length, canonical_id in sorted(candidates):
+            if start < covered_until:
+                continue
+            end = start - negative_length
+            matches.append((start, end, self.canonical[canonical_id]))
+            covered_until = end
+        return matches
+
+    def count(self, text: str) -> Counter:
+        """Count canonical skill mentions in text"""
+        return Counter(canonical for _, _, canonical in self.find_all(text))
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump((INDEX_FORMAT_VERSION, self), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> "SkillIndex":
+        with open(path, "rb") as f:
+            version, index = pickle.load(f)
+        if version != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported skill index format {version}")
+        return index
+
+
+def load_or_build(aliases: dict, prebuilt_path: str = None, source_path: str = None) -> SkillIndex:
+    """Load a prebuilt index if it is newer than its taxonomy, otherwise compile one"""
+    if prebuilt_path and os.path.exists(prebuilt_path):
+        if source_path is None or os.path.getmtime(prebuilt_path) >= os.path.getmtime(source_path):
+            try:
+                return SkillIndex.load(prebuilt_path)
+            except Exception as e:
+                log.warning("ignoring prebuilt skill index", extra={"path": prebuilt_path, "error": str(e)})
+    return SkillIndex(aliases)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print(__doc__)
+        sys.exit(1)
+    from local_analyzer import SKILL_INDEX_PATH, SKILLS_PATH, SkillTaxonomy
+
+    output = sys.argv[2] if len(sys.argv) > 2 else SKILL_INDEX_PATH
+    taxonomy = SkillTaxonomy.load(SKILLS_PATH, prebuilt_path=None)
+    taxonomy.index.save(output)
+    print(f"✅ Skill index with {len(taxonomy.aliases)} aliases ({taxonomy.index.size} states) written to {output}")
@@ -1,18 +1,33 @@
 #!/usr/bin/env python3
 """
 Startup script for Career Compass API server
+
+Development (default): one uvicorn process with auto-reload.
+Production (--production or SERVER_MODE=production): several worker
+processes. With gunicorn installed (Linux/macOS), the app and skill index
+are loaded once in the master and the workers are forked from it.
+Otherwise uvicorn starts the workers and each one imports the app itself.
+uvloop and httptools are used when installed (pip install "uvicorn[standard]").
+On SIGTERM the workers stop accepting connections and give in-flight
+requests, jobs and Gemini calls SHUTDOWN_DRAIN_TIMEOUT seconds to finish.
 """
-import uvicorn
+import argparse
+import importlib
+import importlib.util
 import os
+
+import uvicorn
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-if __name__ == "__main__":
-    print("🚀 Starting Career Compass API Server...")
-    print("=" * 50)
-    
+
+def available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def check_api_key():
     # Check if Gemini API key is configured
     gemini_key = os.getenv("GEMINI_API_KEY")
     if not gemini_key or gemini_key == "your_gemini_api_key_here":
@@ -22,19 +37,101 @@ if __name__ == "__main__":
         print()
     else:
         print("✅ Gemini API key configured")
-    
+
+
+def preload(app_module: str):
+    """Import the app and load the skill index before any worker starts"""
+    module = importlib.import_module(app_module)
+    from local_analyzer import get_taxonomy
+    get_taxonomy()
+    return module.app
+
+
+def run_gunicorn(app, host: str, port: int, workers: int, drain: float):
+    from gunicorn.app.base import BaseApplication
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        # auto = uvloop / httptools when installed
+        CONFIG_KWARGS = {"loop": "auto", "http": "auto", "timeout_graceful_shutdown": drain}
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", Worker)
+            self.cfg.set("preload_app", True)
+            # Open connections, then jobs and Gemini calls, each get `drain` seconds
+            self.cfg.set("graceful_timeout", int(drain * 2 + 5))
+
+        def load(self):
+            return app
+
+    PreloadedApplication().run()
+
+
+def run_production(args):
+    # Set before the app is imported: workers share caches through SQLite
+    # and split the Gemini quota (see admission.py)
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    os.environ.setdefault("ANALYSIS_CACHE_DB", "cache/analysis.db")
+    drain = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "30"))
+    use_gunicorn = args.workers > 1 and available("gunicorn") and os.name != "nt"
+
+    print(f"🏭 Production mode: {args.workers} worker(s) on http://{args.host}:{args.port}")
+    print(f"   Event loop: {'uvloop' if available('uvloop') else 'asyncio'}, "
+          f"HTTP parser: {'httptools' if available('httptools') else 'h11'}")
+    print(f"   Process manager: {'gunicorn (preloaded app)' if use_gunicorn else 'uvicorn'}")
+    print(f"   Shared caches: {os.environ['ANALYSIS_CACHE_DB']}, {os.getenv('EXTRACTION_CACHE_DB', 'cache/extractions.db')}")
+
+    if use_gunicorn:
+        run_gunicorn(preload(args.app), args.host, args.port, args.workers, drain)
+    elif args.workers > 1:
+        # uvicorn spawns its workers, so each imports the app (build data/skills.index to make that fast)
+        uvicorn.run(f"{args.app}:app", host=args.host, port=args.port, workers=args.workers,
+                    timeout_graceful_shutdown=drain, log_level="info")
+    else:
+        uvicorn.run(preload(args.app), host=args.host, port=args.port,
+                    timeout_graceful_shutdown=drain, log_level="info")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--production", action="store_true", default=os.getenv("SERVER_MODE") == "production",
+                        help="multi-worker server without auto-reload")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="worker processes in production mode (default: WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--app", default="main", help="module to serve: main or simple_server")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+
+    print("🚀 Starting Career Compass API Server...")
+    print("=" * 50)
+    check_api_key()
+
     print("📡 Server will be available at:")
-    print("   - Main API: http://localhost:8000")
-    print("   - API Docs: http://localhost:8000/docs")
-    print("   - Health Check: http://localhost:8000/health")
+    print(f"   - Main API: http://localhost:{args.port}")
+    print(f"   - API Docs: http://localhost:{args.port}/docs")
+    print(f"   - Health Check: http://localhost:{args.port}/health")
     print()
     print("Press Ctrl+C to stop the server")
     print("=" * 50)
-    
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+
+    if args.production:
+        run_production(args)
+    else:
+        uvicorn.run(
+            f"{args.app}:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level="info"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the Career Compass job queue
+
+Runs the app in-process with the fake Gemini backend and a throwaway job
+database, so no server, API key or network is needed:
+
+    python test_jobs.py      (or: python -m pytest test_jobs.py)
+"""
+import os
+import sys
+import tempfile
+import time
+
+_workdir = tempfile.mkdtemp(prefix="career-compass-jobs-")
+os.environ.update({
+    "GEMINI_BACKEND": "fake",
+    "FAKE_LLM_LATENCY": "fixed:0",
+    "FAKE_LLM_FAILURE_RATE": "0",
+    "FAKE_LLM_QUOTA_RATE": "0",
+    "LOCAL_FALLBACK": "true",
+    "JOBS_DB": os.path.join(_workdir, "jobs.db"),
+    "JOBS_WORKERS": "1",
+    "JOBS_RETRY_BASE": "0.05",
+    "JOBS_MAX_ATTEMPTS": "3",
+    "JD_LIBRARY_DB": os.path.join(_workdir, "postings.db"),
+    "PROFILES_DB": os.path.join(_workdir, "profiles.db"),
+    "ANALYSIS_CACHE_DB": "",
+    "EXTRACTION_CACHE_DB": "",
+})
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from job_queue import JobQueue
+
+RESUME = "SKILLS\nPython, Django, PostgreSQL, Docker\n\nEXPERIENCE\nBackend Engineer 2019-2024"
+JOB_DESCRIPTION = "Backend developer with Python, Kubernetes and GraphQL"
+
+
+def fail_first_calls(count: int):
+    """Make the primary fake model raise on its next count calls"""
+    model = main.model_registry.get(main.GEMINI_MODEL)
+    respond = model.generate_content_async
+    calls = []
+
+    async def flaky(prompt, stream=False):
+        calls.append(prompt)
+        if len(calls) <= count:
+            raise RuntimeError("503 unavailable (test)")
+        return await respond(prompt, stream=stream)
+
+    model.generate_content_async = flaky
+    return calls
+
+
+def test_job_retries_gemini_instead_of_storing_local_fallback():
+    """A Gemini failure on the first attempt is retried; the stored result is Gemini's"""
+    print("🔍 Testing job retry after a Gemini failure...")
+    calls = fail_first_calls(1)
+    with TestClient(main.app) as client:
+        response = client.post("/jobs/text", json={"resume_text": RESUME, "job_description": JOB_DESCRIPTION})
+        assert response.status_code == 202
+        job = client.get(f"{response.json()['status_url']}?wait=10").json()
+    print(f"   Status: {job['status']}, attempts: {job['attempts']}, Gemini calls: {len(calls)}")
+    assert job["status"] == "done"
+    assert job["attempts"] == 2
+    assert job["result"]["source"] == "gemini"
+    assert len(calls) == 2
+
+
+def test_expired_lease_cannot_overwrite_new_owner():
+    """A worker whose lease expired cannot complete or fail a job another worker reclaimed"""
+    print("🔍 Testing lease ownership...")
+    queue = JobQueue(os.path.join(_workdir, "leases.db"), lease=0.05)
+    job_id = queue.submit("analysis", {})
+    _, _, _, _, stale_token = queue.claim()
+    time.sleep(0.1)
+    _, _, _, attempt, token = queue.claim()
+    assert attempt == 2
+    assert not queue.complete(job_id, stale_token, {"owner": "stale"})
+    assert not queue.fail(job_id, stale_token, 1, "stale failure", retryable=False)
+    assert not queue.renew(job_id, stale_token)
+    assert queue.complete(job_id, token, {"owner": "current"})
+    job = queue.get(job_id)
+    print(f"   Status: {job['status']}, result: {job['result']}")
+    assert job["status"] == "done" and job["result"] == {"owner": "current"}
+
+
+if __name__ == "__main__":
+    test_job_retries_gemini_instead_of_storing_local_fallback()
+    test_expired_lease_cannot_overwrite_new_owner()
+    print("✅ Job queue tests passed")
@@ -0,0 +1,244 @@
+"""
+Streaming, size-bounded upload ingestion for Career Compass
+
+Uploads are read in chunks: the SHA-256 is computed as bytes arrive, the
+document type is sniffed from its leading bytes, and anything above
+UPLOAD_SPOOL_BYTES is spooled to a temporary file instead of being held
+in memory. RequestSizeLimitMiddleware enforces the per-request and
+per-file limits while the multipart body is still streaming in, so an
+oversized upload is rejected with 413 before it has been buffered.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+SNIFF_BYTES = 2048
+# Room for a part's multipart headers on top of UPLOAD_MAX_FILE_BYTES when counting the raw body
+PART_HEADER_ALLOWANCE = 16 * 1024
+
+_TEXT_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+
+
+def sniff_type(head: bytes) -> str:
+    """Identify a document from its leading bytes.
+
+    Returns "pdf", "zip", "rtf", "html", "text" or "binary".
+    """
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "zip"
+    if head.startswith(b"{\\rtf"):
+        return "rtf"
+    if head.startswith(_TEXT_BOMS):
+        return "text"
+    if b"\x00" in head:
+        return "binary"
+    start = head.lstrip().lower()
+    if start.startswith((b"<!doctype html", b"<html")):
+        return "html"
+    return "text"
+
+
+def format_size(size: int) -> str:
+    """Human-readable byte count, e.g. 10 MB, 1.5 MB, 512 KB or 100 bytes"""
+    for unit, scale in (("MB", 1024 * 1024), ("KB", 1024)):
+        if size >= scale:
+            return f"{size / scale:.1f}".removesuffix(".0") + f" {unit}"
+    return f"{size} bytes"
+
+
+def too_large(filename: str, limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"{filename} is larger than the {format_size(limit)} upload limit"
+    )
+
+
+class IngestedUpload:
+    """An upload held in memory, or in a temporary file above UPLOAD_SPOOL_BYTES"""
+
+    def __init__(self, filename: str):
+        self.filename = filename or "upload"
+        self.size = 0
+        self.sha256 = None
+        self.kind = None
+        self.path = None
+        self._buffer = bytearray()
+        self._file = None
+
+    @property
+    def spooled(self) -> bool:
+        return self._file is not None
+
+    def _write(self, chunk: bytes):
+        if self._file is None and len(self._buffer) + len(chunk) > UPLOAD_SPOOL_BYTES:
+            self._file = tempfile.NamedTemporaryFile(prefix="upload-", dir=UPLOAD_SPOOL_DIR, delete=False)
+            self.path = self._file.name
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer += chunk
+
+    def _finish(self):
+        if self._file is not None:
+            self._file.close()
+
+    def read(self) -> bytes:
+        if self.path is None:
+            return bytes(self._buffer)
+        with open(self.path, "rb") as spooled:
+            return spooled.read()
+
+    def source(self):
+        """Path of the spooled file, or the bytes when held in memory"""
+        return self.path if self.path is not None else bytes(self._buffer)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self._buffer = bytearray()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+async def ingest_upload(upload: UploadFile, max_bytes: int = None) -> IngestedUpload:
+    """Read a parsed upload in chunks, hashing, sniffing and spooling it on the way.
+
+    Oversized parts are normally cut off by RequestSizeLimitMiddleware while
+    the body streams in; the exact max_bytes check here (UPLOAD_MAX_FILE_BYTES
+    by default) is the backstop. The caller must close() the result.
+    """
+    max_bytes = max_bytes or UPLOAD_MAX_FILE_BYTES
+    if upload.size is not None and upload.size > max_bytes:
+        raise too_large(upload.filename, max_bytes)
+
+    document = IngestedUpload(upload.filename)
+    digest = hashlib.sha256()
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            document.size += len(chunk)
+            if document.size > max_bytes:
+                raise too_large(upload.filename, max_bytes)
+            if document.kind is None:
+                document.kind = sniff_type(chunk[:SNIFF_BYTES])
+            digest.update(chunk)
+            if document.spooled or len(document._buffer) + len(chunk) > UPLOAD_SPOOL_BYTES:
+                await asyncio.to_thread(document._write, chunk)
+            else:
+                document._write(chunk)
+        document._finish()
+    except BaseException:
+        document.close()
+        raise
+    document.sha256 = digest.hexdigest()
+    document.kind = document.kind or "text"
+    return document
+
+
+def multipart_boundary(headers: dict):
+    """Boundary of a multipart/form-data request, or None"""
+    content_type = headers.get(b"content-type", b"").decode("latin-1")
+    media_type, _, params = content_type.partition(";")
+    if media_type.strip().lower() != "multipart/form-data":
+        return None
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+class PartSizeGuard:
+    """Counts the bytes of each multipart part as the raw body streams in
+
+    Only the part delimiters are searched for, so the form is not parsed
+    twice; a part's size includes its headers, hence the allowance.
+    """
+
+    def __init__(self, boundary: bytes, max_bytes: int):
+        self.delimiter = b"\r\n--" + boundary
+        self.max_bytes = max_bytes + PART_HEADER_ALLOWANCE
+        self.part_size = 0
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> bool:
+        """Count chunk; False once the current part is over the limit"""
+        data = self._tail + chunk
+        end = data.rfind(self.delimiter)
+        if end >= 0:
+            self.part_size = len(data) - end - len(self.delimiter)
+        else:
+            self.part_size += len(chunk)
+        # Keep enough bytes to spot a delimiter split across chunks
+        self._tail = data[-(len(self.delimiter) - 1):]
+        return self.part_size <= self.max_bytes
+
+
+class RequestSizeLimitMiddleware:
+    """ASGI middleware rejecting oversized request bodies and uploads with 413.
+
+    Declared Content-Length is checked before anything is read; chunked
+    bodies are counted as they stream in, and each part of a multipart
+    body is held to max_file_bytes, so an oversized upload is cut off
+    while the form is still being parsed.
+    """
+
+    def __init__(self, app, max_bytes: int = None, max_file_bytes: int = None):
+        self.app = app
+        self.max_bytes = max_bytes or UPLOAD_MAX_REQUEST_BYTES
+        self.max_file_bytes = max_file_bytes or UPLOAD_MAX_FILE_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body is larger than the {format_size(self.max_bytes)} limit"
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+        boundary = multipart_boundary(headers)
+        parts = PartSizeGuard(boundary, self.max_file_bytes) if boundary else None
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=detail)
+                if parts is not None and not parts.feed(body):
+                    raise too_large("An uploaded file", self.max_file_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
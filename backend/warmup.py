@@ -0,0 +1,78 @@
+"""
+Background warm-up of slow-to-initialise components
+
+The server starts listening as soon as the app module is imported; the
+skill automaton, the Gemini SDK and model clients and the PDF worker
+processes are then initialised one after another in a background thread.
+Requests that arrive earlier load what they need on demand. Readiness
+(warm-up finished) is reported separately from liveness.
+"""
+import asyncio
+import logging
+import time
+
+log = logging.getLogger("career_compass.warmup")
+
+
+class WarmUp:
+    """Ordered warm-up steps run off the event loop after startup"""
+
+    def __init__(self):
+        self.steps = []
+        self.status = {}
+        self.started_at = None
+        self.finished_at = None
+        self._task = None
+
+    def add(self, name: str, function):
+        """Register a blocking function to run during warm-up"""
+        self.steps.append((name, function))
+        self.status[name] = {"state": "pending"}
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        for name, function in self.steps:
+            entry = self.status[name]
+            entry["state"] = "running"
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(function)
+            except Exception as e:
+                entry["state"] = "failed"
+                entry["error"] = f"{type(e).__name__}: {e}"[:200]
+                log.warning("warm-up step failed", extra={"step": name, "error": entry["error"]})
+            else:
+                entry["state"] = "done"
+            entry["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.finished_at = time.perf_counter()
+        log.info("warm-up finished", extra={
+            "elapsed_ms": round((self.finished_at - self.started_at) * 1000, 1),
+            "failed": [name for name, entry in self.status.items() if entry["state"] == "failed"],
+        })
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> dict:
+        if not self.finished:
+            state = "warming_up"
+        elif any(entry["state"] == "failed" for entry in self.status.values()):
+            # Failed steps are retried on demand; the server still answers (possibly via local fallback)
+            state = "degraded"
+        else:
+            state = "ready"
+        return {
+            "status": state,
+            "elapsed_ms": round(((self.finished_at or time.perf_counter()) - self.started_at) * 1000, 1)
+            if self.started_at is not None else None,
+            "steps": self.status,
+        }